@@ -0,0 +1,35 @@
+"""
+Mood nearest-neighbour query time over a synthetic memory-mapped catalog.
+
+Run from backend/:  python -m benchmarks.bench_catalog [rows]
+"""
+import sys
+import tempfile
+import timeit
+import numpy as np
+from src.catalog import TrackCatalog
+from src.spotify_service import MOOD_AUDIO_FEATURES
+
+
+def main(rows: int = 2_000_000, number: int = 20):
+    rng = np.random.default_rng(0)
+    with tempfile.TemporaryDirectory() as path:
+        TrackCatalog.save(
+            path,
+            ids=np.char.zfill(np.arange(rows).astype("S22"), 22),
+            energy=rng.random(rows),
+            valence=rng.random(rows),
+            tempo=rng.uniform(60, 200, rows),
+        )
+        catalog = TrackCatalog.load(path)
+
+        print(f"{rows:,} tracks")
+        print(f"{'mood':15} {'ms/query':>9}")
+        for mood, features in MOOD_AUDIO_FEATURES.items():
+            catalog.nearest(features, 20)  # page the columns in
+            seconds = timeit.timeit(lambda: catalog.nearest(features, 20), number=number)
+            print(f"{mood:15} {seconds / number * 1000:9.2f}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 2_000_000)
@@ -0,0 +1,34 @@
+"""
+CPU cost vs bytes saved for response compression, per endpoint payload.
+
+Run from backend/:  python -m benchmarks.bench_compression
+"""
+import timeit
+from src.compression import CompressionMiddleware, brotli
+from src.quiz_data import serialize_quiz_questions
+from src.responses import dumps
+from benchmarks.bench_json import PAYLOADS
+
+SETTINGS = [("gzip", 1), ("gzip", 6), ("gzip", 9)]
+if brotli is not None:
+    SETTINGS += [("br", 4), ("br", 11)]
+
+
+def main(number: int = 200):
+    bodies = {name: dumps(payload) for name, payload in PAYLOADS.items()}
+    bodies["GET /quiz/questions"] = serialize_quiz_questions()[0]
+
+    print(f"{'endpoint':40} {'encoding':9} {'bytes':>7} {'saved':>6} {'µs':>8}")
+    for name, body in bodies.items():
+        print(f"{name:40} {'identity':9} {len(body):7d} {'':>6} {'':>8}")
+        for encoding, level in SETTINGS:
+            middleware = CompressionMiddleware(app=None, gzip_level=level, brotli_quality=level)
+            compressed = middleware.compress(body, encoding)
+            seconds = timeit.timeit(lambda: middleware.compress(body, encoding), number=number)
+            saved = 1 - len(compressed) / len(body)
+            label = f"{encoding}-{level}"
+            print(f"{'':40} {label:9} {len(compressed):7d} {saved:6.0%} {seconds / number * 1e6:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Serialization cost per endpoint: FastAPI's default path vs FastJSONResponse.
+
+Run from backend/:  python -m benchmarks.bench_json
+"""
+import timeit
+from datetime import datetime
+from bson import ObjectId
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from src.responses import FastJSONResponse
+from src.quiz_data import calculate_mood_scores
+
+
+def _track(i):
+    return {
+        "id": f"4uLU6hMCjMI75M1A2tKUQ{i % 10}",
+        "name": f"Track number {i}",
+        "artists": ["Some Artist", "Featured Artist"],
+        "duration": 3.42,
+        "preview_url": f"https://p.scdn.co/mp3-preview/{i:040d}",
+        "uri": f"spotify:track:4uLU6hMCjMI75M1A2tKUQ{i % 10}",
+        "image": f"https://i.scdn.co/image/ab67616d0000b273{i:024d}",
+    }
+
+
+def _mood_result():
+    return {
+        "id": ObjectId(),
+        **calculate_mood_scores({q: q % 4 for q in range(10)}),
+        "createdAt": datetime.utcnow(),
+    }
+
+
+PAYLOADS = {
+    "POST /spotify/generate-playlist": {
+        "tracks": [_track(i) for i in range(20)], "mood": "calm", "draftId": str(ObjectId())
+    },
+    "POST /spotify/create-playlist": {
+        "success": True, "playlistId": ObjectId(), "spotifyPlaylistId": "37i9dQZF1DXcBWIGoYBM5M",
+        "playlistUrl": "https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M",
+        "playlistName": "Tripify – Calm Mix", "tracksAdded": 20,
+        "tracks": [_track(i) for i in range(20)],
+    },
+    "GET /quiz/mood-history (100)": {
+        "moodHistory": [_mood_result() for _ in range(100)], "nextCursor": None
+    },
+    "GET /spotify/playlists (100)": {
+        "playlists": [
+            {
+                "id": ObjectId(), "mood": "calm", "playlistName": "Tripify – Calm Mix",
+                "playlistUrl": "https://open.spotify.com/playlist/37i9dQZF1DXcBWIGoYBM5M",
+                "tracksCount": 20, "createdAt": datetime.utcnow(),
+            }
+            for _ in range(100)
+        ],
+        "nextCursor": None,
+    },
+    "POST /quiz/calculate-mood/batch (100)": {
+        "results": [{"index": i, "status": "ok", **_mood_result()} for i in range(100)],
+        "saved": 100, "failed": 0,
+    },
+}
+
+
+def _default_path(content):
+    # What FastAPI does for a returned dict: jsonable_encoder, then JSONResponse.render
+    return JSONResponse.render(None, jsonable_encoder(content, custom_encoder={ObjectId: str}))
+
+
+def _fast_path(content):
+    return FastJSONResponse.render(None, content)
+
+
+def main(number: int = 2000):
+    print(f"{'endpoint':40} {'default µs':>11} {'fast µs':>9} {'speedup':>8}")
+    for name, payload in PAYLOADS.items():
+        default = timeit.timeit(lambda: _default_path(payload), number=number) / number * 1e6
+        fast = timeit.timeit(lambda: _fast_path(payload), number=number) / number * 1e6
+        print(f"{name:40} {default:11.1f} {fast:9.1f} {default / fast:7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
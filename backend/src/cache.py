@@ -0,0 +1,120 @@
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future
+
+
+class CacheBackend:
+    """
+    Interface for key/value caches used by the service layer.
+
+    Keys are strings and values are JSON-serializable, so a shared backend
+    (Redis, Memcached, a Mongo collection...) can be swapped in for the
+    in-process one without changing callers.
+    """
+
+    def get(self, key: str):
+        """Return the cached value, or None if missing or expired"""
+        raise NotImplementedError
+
+    def set(self, key: str, value, ttl: float = None):
+        """Store a value, expiring after ttl seconds (backend default if None)"""
+        raise NotImplementedError
+
+    def delete(self, key: str):
+        """Remove a key if present"""
+        raise NotImplementedError
+
+    def clear(self):
+        """Remove every key"""
+        raise NotImplementedError
+
+
+class MemoryCache(CacheBackend):
+    """Thread-safe in-process cache with per-entry TTL and LRU eviction"""
+
+    def __init__(self, max_entries: int = 1024, ttl: float = 300, clock=time.monotonic):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._clock = clock
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: str):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: str, value, ttl: float = None):
+        expires_at = self._clock() + (self.ttl if ttl is None else ttl)
+        with self._lock:
+            self._entries[key] = (expires_at, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SingleFlight:
+    """
+    Coalesce concurrent identical calls (thread-safe).
+
+    While a call for a key is running, other callers with the same key wait
+    for it and get its result (or exception) instead of starting their own.
+    Nothing is kept once the call finishes; pair with a cache for that.
+    on_coalesce(key) is called for every caller that joined a running call.
+    """
+
+    def __init__(self, on_coalesce=None):
+        self._calls = {}
+        self._lock = threading.Lock()
+        self.on_coalesce = on_coalesce
+        self.coalesced = 0
+
+    def do(self, key: str, func, *args, **kwargs):
+        with self._lock:
+            future = self._calls.get(key)
+            leader = future is None
+            if leader:
+                future = self._calls[key] = Future()
+            else:
+                self.coalesced += 1
+
+        if not leader:
+            if self.on_coalesce is not None:
+                self.on_coalesce(key)
+            return future.result()
+
+        try:
+            result = func(*args, **kwargs)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            with self._lock:
+                del self._calls[key]
@@ -0,0 +1,136 @@
+import logging
+import os
+import threading
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Directory holding the catalog's .npy columns (unset = no local catalog)
+TRACK_CATALOG_PATH = os.getenv("TRACK_CATALOG_PATH")
+
+# Feature columns and the scale used to make their distances comparable
+# (energy and valence are 0..1, tempo is BPM)
+FEATURES = {"energy": 1.0, "valence": 1.0, "tempo": 200.0}
+OPTIONAL_COLUMNS = ("names", "artists")
+
+
+class TrackCatalog:
+    """
+    Read-only table of track features, one memory-mapped .npy file per column.
+
+    Columns: ids (Spotify track ids, bytes), energy, valence, tempo (float32)
+    and optionally names and artists (str). Only the pages a query touches
+    are read from disk, so multi-million-row catalogs load instantly.
+    """
+
+    def __init__(self, columns: dict):
+        self.ids = columns["ids"]
+        self.features = {name: columns[name] for name in FEATURES}
+        self.names = columns.get("names")
+        self.artists = columns.get("artists")
+
+    def __len__(self):
+        return len(self.ids)
+
+    @classmethod
+    def load(cls, path: str) -> "TrackCatalog":
+        columns = {}
+        for name in ("ids", *FEATURES, *OPTIONAL_COLUMNS):
+            file_path = os.path.join(path, f"{name}.npy")
+            if name in OPTIONAL_COLUMNS and not os.path.exists(file_path):
+                continue
+            columns[name] = np.load(file_path, mmap_mode="r")
+        return cls(columns)
+
+    @staticmethod
+    def save(path: str, ids, energy, valence, tempo, names=None, artists=None):
+        """Write catalog columns (e.g. from an offline export) in the layout load() expects"""
+        os.makedirs(path, exist_ok=True)
+        columns = {
+            "ids": np.asarray(ids, dtype="S22"),
+            "energy": np.asarray(energy, dtype=np.float32),
+            "valence": np.asarray(valence, dtype=np.float32),
+            "tempo": np.asarray(tempo, dtype=np.float32),
+        }
+        if names is not None:
+            columns["names"] = np.asarray(names, dtype=str)
+        if artists is not None:
+            columns["artists"] = np.asarray(artists, dtype=str)
+        for name, column in columns.items():
+            np.save(os.path.join(path, f"{name}.npy"), column)
+
+    def nearest(self, mood_features: dict, k: int, exclude_ids=()) -> list:
+        """
+        Get the k tracks closest to a mood's targets that satisfy its constraints.
+
+        mood_features uses the MOOD_AUDIO_FEATURES keys: target_<feature>,
+        min_<feature> and max_<feature>. Distance is Euclidean over the
+        targeted features, each divided by its FEATURES scale.
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for feature, column in self.features.items():
+            low = mood_features.get(f"min_{feature}")
+            high = mood_features.get(f"max_{feature}")
+            if low is not None:
+                mask &= column >= low
+            if high is not None:
+                mask &= column <= high
+        candidates = np.flatnonzero(mask)
+
+        distance = np.zeros(len(candidates), dtype=np.float32)
+        for feature, scale in FEATURES.items():
+            target = mood_features.get(f"target_{feature}")
+            if target is not None:
+                distance += np.square((self.features[feature][candidates] - target) / scale)
+
+        # Over-fetch by the number of exclusions so filtering can't leave us short
+        exclude = {i.encode() if isinstance(i, str) else i for i in exclude_ids}
+        want = min(k + len(exclude), len(candidates))
+        if want == 0:
+            return []
+        top = np.argpartition(distance, want - 1)[:want]
+        top = top[np.argsort(distance[top], kind="stable")]
+
+        tracks = []
+        for row in candidates[top]:
+            track_id = bytes(self.ids[row])
+            if track_id in exclude:
+                continue
+            tracks.append(self._track(row))
+            if len(tracks) == k:
+                break
+        return tracks
+
+    def _track(self, row: int) -> dict:
+        track_id = bytes(self.ids[row]).decode()
+        return {
+            "id": track_id,
+            "name": str(self.names[row]) if self.names is not None else None,
+            "artists": [str(self.artists[row])] if self.artists is not None else [],
+            "uri": f"spotify:track:{track_id}",
+            **{feature: float(column[row]) for feature, column in self.features.items()},
+        }
+
+
+_catalog = None
+_catalog_loaded = False
+_catalog_lock = threading.Lock()
+
+
+def get_track_catalog():
+    """Get the catalog at TRACK_CATALOG_PATH (loaded on first use), or None if there isn't one"""
+    global _catalog, _catalog_loaded
+    if not _catalog_loaded:
+        with _catalog_lock:
+            if not _catalog_loaded:
+                if TRACK_CATALOG_PATH:
+                    try:
+                        _catalog = TrackCatalog.load(TRACK_CATALOG_PATH)
+                        logger.info("Loaded track catalog with %d tracks", len(_catalog))
+                    except (OSError, ValueError, KeyError) as e:
+                        logger.error("Could not load track catalog from %s: %s", TRACK_CATALOG_PATH, e)
+                _catalog_loaded = True
+    return _catalog
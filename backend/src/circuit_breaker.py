@@ -0,0 +1,100 @@
+import threading
+import time
+from collections import deque
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency while its circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit is open, retry after {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class CircuitBreaker:
+    """
+    Fail fast once a dependency's recent error rate is too high.
+
+    closed:    calls go through; the last window_size outcomes are kept.
+               Once at least min_calls are recorded and the failure ratio
+               reaches failure_threshold, the circuit opens.
+    open:      calls raise CircuitOpenError for open_seconds.
+    half_open: one trial call is let through. Success closes the circuit
+               (with a fresh window), failure opens it again. If the trial
+               never reaches the dependency, cancel_trial() frees the slot.
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, name: str, failure_threshold: float = 0.5, window_size: int = 20,
+                 min_calls: int = 10, open_seconds: float = 30.0, clock=time.monotonic):
+        self.name = name
+        self.failure_threshold = failure_threshold
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self._outcomes = deque(maxlen=window_size)  # True = failure
+        self._state = self.CLOSED
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+        self._lock = threading.Lock()
+        self._clock = clock
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and self._clock() - self._opened_at >= self.open_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def before_call(self) -> bool:
+        """
+        Raise CircuitOpenError unless a call may go through now.
+
+        Returns True when this call is the half-open trial.
+        """
+        with self._lock:
+            if self._state == self.CLOSED:
+                return False
+            remaining = self._opened_at + self.open_seconds - self._clock()
+            if self._state == self.OPEN and remaining <= 0:
+                self._state = self.HALF_OPEN
+            if self._state == self.HALF_OPEN and not self._trial_in_flight:
+                self._trial_in_flight = True
+                return True
+            raise CircuitOpenError(self.name, max(remaining, 0.0))
+
+    def cancel_trial(self):
+        """Give the trial slot back when the trial call was never made"""
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._state = self.CLOSED
+                self._trial_in_flight = False
+                self._outcomes.clear()
+            self._outcomes.append(False)
+
+    def record_failure(self):
+        with self._lock:
+            if self._state == self.HALF_OPEN:
+                self._open()
+                return
+            self._outcomes.append(True)
+            if (
+                self._state == self.CLOSED
+                and len(self._outcomes) >= self.min_calls
+                and sum(self._outcomes) / len(self._outcomes) >= self.failure_threshold
+            ):
+                self._open()
+
+    def _open(self):
+        self._state = self.OPEN
+        self._opened_at = self._clock()
+        self._trial_in_flight = False
+        self._outcomes.clear()
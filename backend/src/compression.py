@@ -0,0 +1,107 @@
+import gzip
+from starlette.datastructures import Headers, MutableHeaders
+
+try:
+    import brotli
+except ImportError:  # optional dependency; gzip only without it
+    brotli = None
+
+COMPRESSIBLE_TYPES = ("application/json", "text/", "application/javascript", "image/svg+xml")
+
+
+def _accepted_encodings(accept_encoding: str) -> set:
+    """Parse an Accept-Encoding header into the set of encodings with q > 0"""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        encoding, _, params = part.strip().partition(";")
+        quality = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                quality = float(params[2:])
+            except ValueError:
+                quality = 0.0
+        if encoding and quality > 0:
+            accepted.add(encoding)
+    return accepted
+
+
+class CompressionMiddleware:
+    """
+    Compress response bodies with brotli (if installed and accepted) or gzip.
+
+    Bodies smaller than minimum_size, non-text content types, already-encoded
+    responses and streaming responses are passed through untouched.
+    """
+
+    def __init__(self, app, minimum_size: int = 500, gzip_level: int = 6,
+                 brotli_quality: int = 4, enable_brotli: bool = True):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.gzip_level = gzip_level
+        self.brotli_quality = brotli_quality
+        self.enable_brotli = enable_brotli and brotli is not None
+
+    def _choose_encoding(self, scope):
+        accepted = _accepted_encodings(Headers(scope=scope).get("accept-encoding", ""))
+        if self.enable_brotli and "br" in accepted:
+            return "br"
+        if "gzip" in accepted:
+            return "gzip"
+        return None
+
+    def compress(self, body: bytes, encoding: str) -> bytes:
+        """Compress a body with the given content-coding"""
+        if encoding == "br":
+            return brotli.compress(body, quality=self.brotli_quality)
+        return gzip.compress(body, compresslevel=self.gzip_level)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        encoding = self._choose_encoding(scope)
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+
+        start_message = None
+        started = False
+
+        async def send_compressed(message):
+            nonlocal start_message, started
+            if message["type"] == "http.response.start":
+                start_message = message  # hold until we've seen the body
+                return
+            if message["type"] != "http.response.body" or started:
+                await send(message)
+                return
+
+            started = True
+            body = message.get("body", b"")
+            headers = MutableHeaders(raw=start_message["headers"])
+            content_type = headers.get("content-type", "")
+
+            if (
+                message.get("more_body", False)
+                or len(body) < self.minimum_size
+                or "content-encoding" in headers
+                or not content_type.startswith(COMPRESSIBLE_TYPES)
+            ):
+                await send(start_message)
+                await send(message)
+                return
+
+            body = self.compress(body, encoding)
+            headers["Content-Encoding"] = encoding
+            headers["Content-Length"] = str(len(body))
+            headers.add_vary_header("Accept-Encoding")
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                # The encoded bytes differ from the identity ones, so the tag becomes weak
+                headers["ETag"] = f"W/{etag}"
+            await send(start_message)
+            await send({"type": "http.response.body", "body": body})
+
+        await self.app(scope, receive, send_compressed)
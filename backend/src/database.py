@@ -1,30 +1,68 @@
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo.read_preferences import (
+    Nearest, Primary, PrimaryPreferred, Secondary, SecondaryPreferred
+)
 from pymongo.server_api import ServerApi
+import logging
 import os
 from dotenv import load_dotenv
+from .metrics import METRICS_ENABLED, MongoCommandMetrics, MongoPoolMetrics
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # MongoDB connection settings
 MONGODB_URL = os.getenv("MONGODB_URL", "mongodb://localhost:27017")
 DATABASE_NAME = os.getenv("DATABASE_NAME", "tripify")
 
+# Connection pool settings (per process; total connections = workers x max pool size)
+MONGO_MAX_POOL_SIZE = int(os.getenv("MONGO_MAX_POOL_SIZE", "100"))
+MONGO_MIN_POOL_SIZE = int(os.getenv("MONGO_MIN_POOL_SIZE", "0"))
+MONGO_WAIT_QUEUE_TIMEOUT_MS = int(os.getenv("MONGO_WAIT_QUEUE_TIMEOUT_MS", "0"))  # 0 = wait forever
+MONGO_SERVER_SELECTION_TIMEOUT_MS = int(os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", "30000"))
+MONGO_COMPRESSORS = os.getenv("MONGO_COMPRESSORS", "")  # e.g. "zstd,snappy,zlib"
+
+# Read preference for history/playlist listings (writes and other reads stay on the primary).
+# Secondaries may lag, so a result saved a moment ago can be missing from the first page.
+MONGO_HISTORY_READ_PREFERENCE = os.getenv("MONGO_HISTORY_READ_PREFERENCE", "secondaryPreferred")
+
 # Global variable to store the database connection
 database = None
 client = None
 
 
+def _client_options() -> dict:
+    """Build AsyncIOMotorClient keyword arguments from the MONGO_* settings"""
+    options = {
+        "maxPoolSize": MONGO_MAX_POOL_SIZE,
+        "minPoolSize": MONGO_MIN_POOL_SIZE,
+        "serverSelectionTimeoutMS": MONGO_SERVER_SELECTION_TIMEOUT_MS,
+    }
+    if MONGO_WAIT_QUEUE_TIMEOUT_MS > 0:
+        options["waitQueueTimeoutMS"] = MONGO_WAIT_QUEUE_TIMEOUT_MS
+    if MONGO_COMPRESSORS:
+        # pymongo skips (with a warning) compressors whose library isn't installed
+        options["compressors"] = MONGO_COMPRESSORS
+    return options
+
+
 async def connect_to_mongo():
     """Connect to MongoDB database"""
     global database, client
     try:
-        client = AsyncIOMotorClient(MONGODB_URL, server_api=ServerApi('1'))
+        client = AsyncIOMotorClient(
+            MONGODB_URL,
+            server_api=ServerApi('1'),
+            event_listeners=[MongoCommandMetrics(), MongoPoolMetrics()] if METRICS_ENABLED else [],
+            **_client_options()
+        )
         database = client[DATABASE_NAME]
         # Test the connection
         await client.admin.command('ping')
-        print("Successfully connected to MongoDB!")
+        logger.info("Connected to MongoDB")
     except Exception as e:
-        print(f"Error connecting to MongoDB: {e}")
+        logger.error("Error connecting to MongoDB: %s", e)
         raise
 
 
@@ -33,9 +71,37 @@ async def close_mongo_connection():
     global client
     if client:
         client.close()
-        print("MongoDB connection closed")
+        logger.info("MongoDB connection closed")
 
 
 def get_database():
     """Get database instance"""
     return database
+
+
+READ_PREFERENCES = {
+    "primary": Primary,
+    "primaryPreferred": PrimaryPreferred,
+    "secondary": Secondary,
+    "secondaryPreferred": SecondaryPreferred,
+    "nearest": Nearest,
+}
+
+
+def parse_read_preference(name: str):
+    """Turn a read preference mode name into a pymongo read preference"""
+    if name not in READ_PREFERENCES:
+        raise ValueError(
+            f"Unknown MONGO_HISTORY_READ_PREFERENCE {name!r}; "
+            f"expected one of: {', '.join(READ_PREFERENCES)}"
+        )
+    return READ_PREFERENCES[name]()
+
+
+# Parsed at import, so a typo stops the app at startup rather than on the first history read
+_history_read_preference = parse_read_preference(MONGO_HISTORY_READ_PREFERENCE)
+
+
+def get_history_collection(db, name: str):
+    """Get a collection for history-style listing reads (MONGO_HISTORY_READ_PREFERENCE)"""
+    return db.get_collection(name, read_preference=_history_read_preference)
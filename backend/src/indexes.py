@@ -0,0 +1,98 @@
+import logging
+from pymongo import ASCENDING, DESCENDING, IndexModel
+from pymongo.errors import OperationFailure
+
+logger = logging.getLogger(__name__)
+
+# How long temporary documents live before MongoDB's TTL monitor removes them
+SPOTIFY_AUTH_SESSION_TTL_MINUTES = 10
+PLAYLIST_DRAFT_TTL_MINUTES = 30
+
+# Every index the API's queries rely on, per collection
+INDEXES = {
+    "users": [
+        # login, signup duplicate check and user lookup
+        IndexModel([("email", ASCENDING)], name="email_unique", unique=True),
+    ],
+    "mood_results": [
+        # mood history pages: find({"userId"}).sort([("createdAt", -1), ("_id", -1)])
+        IndexModel(
+            [("userId", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)],
+            name="userId_createdAt_id"
+        ),
+    ],
+    "playlists": [
+        # saved playlist pages: same keyset order as mood history
+        IndexModel(
+            [("userId", ASCENDING), ("createdAt", DESCENDING), ("_id", DESCENDING)],
+            name="userId_createdAt_id"
+        ),
+    ],
+    "spotify_auth_sessions": [
+        IndexModel(
+            [("createdAt", ASCENDING)],
+            name="createdAt_ttl",
+            expireAfterSeconds=SPOTIFY_AUTH_SESSION_TTL_MINUTES * 60
+        ),
+    ],
+    "playlist_drafts": [
+        IndexModel(
+            [("createdAt", ASCENDING)],
+            name="createdAt_ttl",
+            expireAfterSeconds=PLAYLIST_DRAFT_TTL_MINUTES * 60
+        ),
+    ],
+}
+
+
+async def ensure_indexes(db) -> dict:
+    """
+    Create every declared index (no-op for indexes that already exist).
+
+    A failure on one collection (e.g. duplicate emails blocking the unique
+    index) is reported and does not stop the others.
+    """
+    created = {}
+    for collection_name, models in INDEXES.items():
+        try:
+            created[collection_name] = await db[collection_name].create_indexes(models)
+        except OperationFailure as e:
+            logger.error("Could not create indexes on %s: %s", collection_name, e)
+            created[collection_name] = []
+    return created
+
+
+async def _index_usage(collection) -> dict:
+    """Get index name -> number of operations that used it since server start"""
+    try:
+        cursor = collection.aggregate([{"$indexStats": {}}])
+        stats = await cursor.to_list(length=None)
+    except Exception:
+        return {}  # $indexStats needs clusterMonitor rights and a real server
+    return {s["name"]: s["accesses"]["ops"] for s in stats}
+
+
+async def audit_indexes(db) -> dict:
+    """
+    Compare the declared indexes against what exists in the database.
+
+    Returns, per collection, declared indexes that are missing, existing
+    indexes that were never used, and existing indexes nobody declared.
+    """
+    report = {}
+    for collection_name, models in INDEXES.items():
+        collection = db[collection_name]
+        existing = await collection.index_information()
+        declared = {m.document["name"] for m in models}
+        usage = await _index_usage(collection)
+
+        report[collection_name] = {
+            "missing": sorted(declared - set(existing)),
+            "unused": sorted(name for name, ops in usage.items() if ops == 0 and name != "_id_"),
+            "undeclared": sorted(set(existing) - declared - {"_id_"}),
+        }
+
+        for problem, names in report[collection_name].items():
+            if names:
+                logger.warning("Index check: %s has %s indexes: %s", collection_name, problem, ", ".join(names))
+    return report
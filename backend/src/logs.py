@@ -0,0 +1,141 @@
+import json
+import logging
+import os
+import queue
+import uuid
+from contextvars import ContextVar
+from logging.handlers import QueueHandler, QueueListener
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# Logging settings
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()  # json | text
+LOG_QUEUE_SIZE = int(os.getenv("LOG_QUEUE_SIZE", "10000"))
+
+REQUEST_ID_HEADER = "X-Request-ID"
+
+# Correlation id of the request being handled ("-" outside a request)
+request_id_var = ContextVar("request_id", default="-")
+
+
+class RequestIdFilter(logging.Filter):
+    """Stamp each record with the current request id, in the thread that logged it"""
+
+    def filter(self, record):
+        record.request_id = request_id_var.get()
+        return True
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line"""
+
+    def format(self, record):
+        entry = {
+            "time": self.formatTime(record),
+            "level": record.levelname,
+            "logger": record.name,
+            "requestId": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, default=str)
+
+
+class _DroppingQueueHandler(QueueHandler):
+    """
+    QueueHandler that enqueues records unformatted, and drops them instead
+    of blocking when the queue is full.
+    """
+
+    def prepare(self, record):
+        # The stdlib version formats here (on the logging thread) and drops
+        # exc_info; leave both to the listener's formatter instead
+        return record
+
+    def enqueue(self, record):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+_listener = None
+
+
+def configure_logging(stream=None):
+    """
+    Route all logging through a queue drained by a background thread.
+
+    Callers only pay for the level check, stamping the request id and an
+    enqueue; %-interpolation, traceback formatting and the stdout write all
+    happen on the listener thread.
+    """
+    global _listener
+    if _listener is not None:
+        return
+
+    output = logging.StreamHandler(stream)
+    if LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(
+            "%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s"
+        ))
+
+    handler = _DroppingQueueHandler(queue.Queue(LOG_QUEUE_SIZE))
+    handler.addFilter(RequestIdFilter())
+
+    root = logging.getLogger()
+    root.handlers = [handler]
+    root.setLevel(LOG_LEVEL)
+
+    _listener = QueueListener(handler.queue, output, respect_handler_level=True)
+    _listener.start()
+
+
+def stop_logging():
+    """Flush queued records and stop the listener thread"""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+class RequestIdMiddleware:
+    """
+    Give every request a correlation id.
+
+    Reuses the client's X-Request-ID when present, otherwise generates one,
+    and echoes it on the response.
+    """
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for name, value in scope["headers"]:
+            if name == b"x-request-id":
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+
+        async def send_with_request_id(message):
+            if message["type"] == "http.response.start":
+                message.setdefault("headers", []).append(
+                    (REQUEST_ID_HEADER.lower().encode(), request_id.encode("latin-1"))
+                )
+            await send(message)
+
+        token = request_id_var.set(request_id)
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            request_id_var.reset(token)
@@ -1,10 +1,36 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
-from .database import connect_to_mongo, close_mongo_connection
+from fastapi.responses import PlainTextResponse
+import asyncio
+import os
+from .database import connect_to_mongo, close_mongo_connection, get_database
+from .indexes import ensure_indexes, audit_indexes
 from .routes import router
+from .responses import FastJSONResponse
+from .compression import CompressionMiddleware
+from .metrics import METRICS_ENABLED, MetricsMiddleware, render_metrics
+from .logs import RequestIdMiddleware, configure_logging, stop_logging
+from .readiness import check_readiness
+from .spotify_service import shutdown_spotify_executor, close_spotify_session
+from .passwords import get_hash_pool_stats, shutdown_hash_pool
+from .quiz_data import MOOD_LOOKUP_TABLE, get_mood_lookup_table, serialize_quiz_questions
 
 
-app = FastAPI(title="Tripify API", version="1.0.0")
+# Create/verify MongoDB indexes on startup (disable for read-only replicas)
+MONGO_ENSURE_INDEXES = os.getenv("MONGO_ENSURE_INDEXES", "true").lower() == "true"
+
+# Response compression (bodies under COMPRESSION_MIN_SIZE bytes are sent as-is)
+COMPRESSION_ENABLED = os.getenv("COMPRESSION_ENABLED", "true").lower() == "true"
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "500"))
+GZIP_LEVEL = int(os.getenv("GZIP_LEVEL", "6"))
+BROTLI_ENABLED = os.getenv("BROTLI_ENABLED", "true").lower() == "true"
+BROTLI_QUALITY = int(os.getenv("BROTLI_QUALITY", "4"))
+
+app = FastAPI(
+    title="Tripify API",
+    version="1.0.0",
+    default_response_class=FastJSONResponse
+)
 
 # Configure CORS to allow requests from React Native app
 app.add_middleware(
@@ -15,17 +41,45 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Compress large JSON bodies (track lists, history) for mobile clients
+if COMPRESSION_ENABLED:
+    app.add_middleware(
+        CompressionMiddleware,
+        minimum_size=COMPRESSION_MIN_SIZE,
+        gzip_level=GZIP_LEVEL,
+        brotli_quality=BROTLI_QUALITY,
+        enable_brotli=BROTLI_ENABLED,
+    )
+
+# Correlation ids for every log line written while handling a request
+app.add_middleware(RequestIdMiddleware)
+
+# Outermost, so route timings include compression, CORS and request ids
+if METRICS_ENABLED:
+    app.add_middleware(MetricsMiddleware)
+
 
 @app.on_event("startup")
 async def startup_event():
-    """Connect to MongoDB on startup"""
+    """Connect to MongoDB, bootstrap indexes and warm caches on startup"""
+    configure_logging()
     await connect_to_mongo()
+    if MONGO_ENSURE_INDEXES:
+        await ensure_indexes(get_database())
+        await audit_indexes(get_database())
+    serialize_quiz_questions()
+    if MOOD_LOOKUP_TABLE == "startup":
+        await asyncio.to_thread(get_mood_lookup_table)
 
 
 @app.on_event("shutdown")
 async def shutdown_event():
-    """Close MongoDB connection on shutdown"""
+    """Close MongoDB connection and worker pools on shutdown"""
     await close_mongo_connection()
+    shutdown_spotify_executor()
+    close_spotify_session()
+    shutdown_hash_pool()
+    stop_logging()
 
 
 @app.get("/")
@@ -37,7 +91,22 @@ async def root():
 @app.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "healthy"}
+    return {"status": "healthy", "passwordHashing": get_hash_pool_stats()}
+
+
+@app.get("/ready")
+async def readiness_check():
+    """Readiness probe: 503 until MongoDB (and Spotify, if enabled) respond"""
+    report = await check_readiness(get_database())
+    status_code = 200 if report["status"] == "ready" else 503
+    return FastJSONResponse(report, status_code=status_code)
+
+
+if METRICS_ENABLED:
+    @app.get("/metrics", response_class=PlainTextResponse, include_in_schema=False)
+    async def metrics():
+        """Prometheus metrics (request, MongoDB, Spotify and hashing timings)"""
+        return PlainTextResponse(render_metrics(), media_type="text/plain; version=0.0.4")
 
 
 # Include all API routes
@@ -0,0 +1,316 @@
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import contextmanager
+from pymongo import monitoring
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# When disabled, every recording call returns immediately and no middleware,
+# Mongo listener or /metrics route is installed
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+
+# Latency buckets in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _format_labels(label_names: tuple, label_values: tuple, extra: str = "") -> str:
+    """Render {name="value",...} for a sample line"""
+    pairs = [f'{name}="{value}"' for name, value in zip(label_names, label_values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+class Counter:
+    """Monotonic counter, one value per label combination"""
+
+    def __init__(self, name: str, description: str, label_names: tuple = ()):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self._values = {}
+        self._lock = threading.Lock()
+
+    def inc(self, *label_values, amount: float = 1.0):
+        if not METRICS_ENABLED:
+            return
+        with self._lock:
+            self._values[label_values] = self._values.get(label_values, 0.0) + amount
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} counter"]
+        with self._lock:
+            for label_values, value in sorted(self._values.items()):
+                lines.append(f"{self.name}{_format_labels(self.label_names, label_values)} {value}")
+        return lines
+
+
+class Gauge:
+    """Point-in-time value read from a callback when /metrics is scraped"""
+
+    def __init__(self, name: str, description: str, read):
+        self.name = name
+        self.description = description
+        self.read = read
+
+    def render(self) -> list:
+        return [
+            f"# HELP {self.name} {self.description}",
+            f"# TYPE {self.name} gauge",
+            f"{self.name} {self.read()}",
+        ]
+
+
+class Histogram:
+    """Latency histogram with fixed buckets, one series per label combination"""
+
+    def __init__(self, name: str, description: str, label_names: tuple = (), buckets: tuple = DEFAULT_BUCKETS):
+        self.name = name
+        self.description = description
+        self.label_names = label_names
+        self.buckets = buckets
+        self._series = {}  # label values -> [bucket counts..., +Inf count, sum]
+        self._lock = threading.Lock()
+
+    def observe(self, value: float, *label_values):
+        if not METRICS_ENABLED:
+            return
+        index = bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [0] * (len(self.buckets) + 1) + [0.0]
+            series[index] += 1
+            series[-1] += value
+
+    def render(self) -> list:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for label_values, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets + ("+Inf",), series[:-1]):
+                    cumulative += count
+                    labels = _format_labels(self.label_names, label_values, f'le="{bound}"')
+                    lines.append(f"{self.name}_bucket{labels} {cumulative}")
+                labels = _format_labels(self.label_names, label_values)
+                lines.append(f"{self.name}_sum{labels} {series[-1]}")
+                lines.append(f"{self.name}_count{labels} {cumulative}")
+        return lines
+
+
+_registry = []
+
+
+def register(metric):
+    """Add a metric to the /metrics output"""
+    _registry.append(metric)
+    return metric
+
+
+def render_metrics() -> str:
+    """Render every registered metric in Prometheus text format"""
+    lines = []
+    for metric in _registry:
+        lines.extend(metric.render())
+    return "\n".join(lines) + "\n"
+
+
+@contextmanager
+def _timer(histogram: Histogram, errors: Counter, label_values: tuple):
+    started = time.perf_counter()
+    try:
+        yield
+    except Exception:
+        errors.inc(*label_values)
+        raise
+    finally:
+        histogram.observe(time.perf_counter() - started, *label_values)
+
+
+class _NoopTimer:
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+
+_NOOP_TIMER = _NoopTimer()
+
+
+def timed(histogram: Histogram, errors: Counter, *label_values):
+    """Time a block into histogram, counting exceptions into errors"""
+    if not METRICS_ENABLED:
+        return _NOOP_TIMER
+    return _timer(histogram, errors, label_values)
+
+
+# -------------------------------------------------------------
+# HTTP
+# -------------------------------------------------------------
+HTTP_REQUESTS = register(Counter(
+    "tripify_http_requests_total", "HTTP requests by route and status", ("method", "route", "status")
+))
+HTTP_LATENCY = register(Histogram(
+    "tripify_http_request_duration_seconds", "HTTP request latency by route", ("method", "route")
+))
+
+
+class MetricsMiddleware:
+    """Time every HTTP request, labelled by route template (not raw path)"""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        status_code = 500
+        started = time.perf_counter()
+
+        async def send_with_status(message):
+            nonlocal status_code
+            if message["type"] == "http.response.start":
+                status_code = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_status)
+        finally:
+            # The router stores the matched route in the scope on the way in
+            route = scope.get("route")
+            route_path = route.path if route is not None else "unmatched"
+            HTTP_LATENCY.observe(time.perf_counter() - started, scope["method"], route_path)
+            HTTP_REQUESTS.inc(scope["method"], route_path, str(status_code))
+
+
+# -------------------------------------------------------------
+# MONGODB
+# -------------------------------------------------------------
+MONGO_COMMANDS = register(Counter(
+    "tripify_mongo_commands_total", "MongoDB commands sent", ("command",)
+))
+MONGO_ERRORS = register(Counter(
+    "tripify_mongo_command_errors_total", "MongoDB commands that failed", ("command",)
+))
+MONGO_LATENCY = register(Histogram(
+    "tripify_mongo_command_duration_seconds", "MongoDB command latency", ("command",)
+))
+
+
+class MongoCommandMetrics(monitoring.CommandListener):
+    """pymongo listener that records every command's outcome and duration"""
+
+    def started(self, event):
+        MONGO_COMMANDS.inc(event.command_name)
+
+    def succeeded(self, event):
+        MONGO_LATENCY.observe(event.duration_micros / 1e6, event.command_name)
+
+    def failed(self, event):
+        MONGO_ERRORS.inc(event.command_name)
+        MONGO_LATENCY.observe(event.duration_micros / 1e6, event.command_name)
+
+
+MONGO_POOL_WAIT = register(Histogram(
+    "tripify_mongo_pool_checkout_wait_seconds", "Time spent waiting to check a connection out of the pool"
+))
+MONGO_POOL_CHECKOUT_FAILED = register(Counter(
+    "tripify_mongo_pool_checkout_failed_total", "Connection checkouts that failed", ("reason",)
+))
+
+
+_mongo_checked_out = 0
+_mongo_pool_lock = threading.Lock()
+register(Gauge(
+    "tripify_mongo_pool_checked_out", "Connections currently checked out of the pool",
+    lambda: _mongo_checked_out
+))
+
+
+def _add_checked_out(delta: int):
+    global _mongo_checked_out
+    with _mongo_pool_lock:
+        _mongo_checked_out += delta
+
+
+class MongoPoolMetrics(monitoring.ConnectionPoolListener):
+    """pymongo listener that records connection checkout waits and failures"""
+
+    def connection_checked_out(self, event):
+        _add_checked_out(1)
+        MONGO_POOL_WAIT.observe(event.duration)
+
+    def connection_check_out_failed(self, event):
+        MONGO_POOL_CHECKOUT_FAILED.inc(event.reason)
+        MONGO_POOL_WAIT.observe(event.duration)
+
+    def connection_checked_in(self, event):
+        _add_checked_out(-1)
+
+    # Remaining pool events aren't recorded
+    def pool_created(self, event):
+        pass
+
+    def pool_ready(self, event):
+        pass
+
+    def pool_cleared(self, event):
+        pass
+
+    def pool_closed(self, event):
+        pass
+
+    def connection_created(self, event):
+        pass
+
+    def connection_ready(self, event):
+        pass
+
+    def connection_closed(self, event):
+        pass
+
+    def connection_check_out_started(self, event):
+        pass
+
+
+# -------------------------------------------------------------
+# SPOTIFY
+# -------------------------------------------------------------
+SPOTIFY_REQUESTS = register(Counter(
+    "tripify_spotify_requests_total", "HTTP requests sent to Spotify", ("endpoint",)
+))
+SPOTIFY_ERRORS = register(Counter(
+    "tripify_spotify_request_errors_total", "Spotify requests that failed or returned an error status", ("endpoint",)
+))
+SPOTIFY_LATENCY = register(Histogram(
+    "tripify_spotify_request_duration_seconds", "Spotify request latency (retries included)", ("endpoint",)
+))
+SPOTIFY_RATE_LIMIT_WAIT = register(Histogram(
+    "tripify_spotify_rate_limit_wait_seconds", "Time Spotify requests queued for a rate-limit token"
+))
+SPOTIFY_RATE_LIMITED = register(Counter(
+    "tripify_spotify_rate_limited_total", "Spotify requests refused by the outbound rate limiter", ("scope",)
+))
+SPOTIFY_COALESCED = register(Counter(
+    "tripify_spotify_coalesced_total", "Spotify reads that joined an identical call already in flight", ("read",)
+))
+
+
+# -------------------------------------------------------------
+# PASSWORD HASHING
+# -------------------------------------------------------------
+HASH_LATENCY = register(Histogram(
+    "tripify_password_hash_duration_seconds", "bcrypt time inside the hashing pool", ("operation",)
+))
+HASH_WAIT = register(Histogram(
+    "tripify_password_hash_wait_seconds", "Time spent queued for the hashing pool", ("operation",)
+))
+HASH_REJECTED = register(Counter(
+    "tripify_password_hash_rejected_total", "Hashing requests rejected because the queue was full"
+))
@@ -1,5 +1,5 @@
 from pydantic import BaseModel, EmailStr, Field
-from typing import Optional, Dict, List
+from typing import Any, Optional, Dict, List
 from datetime import datetime
 
 
@@ -43,6 +43,16 @@ class QuizAnswers(BaseModel):
     answers: Dict[int, int]  # Question index -> Option index
 
 
+class QuizAnswersBatch(BaseModel):
+    """
+    Schema for submitting many queued quiz answer sets at once.
+
+    Items are validated one by one as QuizAnswers by the route, so a single
+    malformed submission is reported per index instead of failing the batch.
+    """
+    submissions: List[Any] = Field(..., min_length=1, max_length=500)
+
+
 class MoodScores(BaseModel):
     """Schema for mood calculation results"""
     energetic: float
@@ -76,3 +86,4 @@ class CreatePlaylistRequest(BaseModel):
     userId: str
     mood: str
     accessToken: str
+    draftId: Optional[str] = None  # From generate-playlist; reuses the previewed tracks
@@ -0,0 +1,58 @@
+import base64
+from datetime import datetime
+from bson import ObjectId
+
+# Newest first; _id breaks ties between documents created in the same millisecond
+KEYSET_SORT = [("createdAt", -1), ("_id", -1)]
+MAX_PAGE_SIZE = 100
+
+
+def encode_cursor(created_at: datetime, doc_id: ObjectId) -> str:
+    """Build an opaque cursor pointing just after the given document"""
+    raw = f"{created_at.isoformat()}|{doc_id}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str):
+    """Parse a cursor back into (createdAt, _id); raises ValueError if malformed"""
+    try:
+        created_at, doc_id = base64.urlsafe_b64decode(cursor.encode()).decode().split("|")
+        return datetime.fromisoformat(created_at), ObjectId(doc_id)
+    except Exception:
+        raise ValueError("Invalid cursor")
+
+
+def keyset_filter(query: dict, cursor: str = None) -> dict:
+    """Restrict a query to documents that sort after the cursor"""
+    if not cursor:
+        return query
+    created_at, doc_id = decode_cursor(cursor)
+    return {
+        **query,
+        "$or": [
+            {"createdAt": {"$lt": created_at}},
+            {"createdAt": created_at, "_id": {"$lt": doc_id}},
+        ]
+    }
+
+
+async def fetch_page(collection, query: dict, projection: dict, limit: int, cursor: str = None):
+    """
+    Fetch one page of documents, newest first.
+
+    Returns (documents, next_cursor); next_cursor is None on the last page.
+    One extra document is read to know whether another page exists.
+    """
+    limit = min(limit, MAX_PAGE_SIZE)
+    docs = await (
+        collection.find(keyset_filter(query, cursor), projection)
+        .sort(KEYSET_SORT)
+        .limit(limit + 1)
+        .to_list(length=limit + 1)
+    )
+
+    next_cursor = None
+    if len(docs) > limit:
+        docs = docs[:limit]
+        next_cursor = encode_cursor(docs[-1]["createdAt"], docs[-1]["_id"])
+    return docs, next_cursor
@@ -0,0 +1,158 @@
+import asyncio
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from passlib.context import CryptContext
+from dotenv import load_dotenv
+from .metrics import Gauge, register, HASH_LATENCY, HASH_WAIT, HASH_REJECTED
+
+load_dotenv()
+
+# Hashing pool settings
+HASH_POOL_WORKERS = int(os.getenv("HASH_POOL_WORKERS", str(os.cpu_count() or 1)))
+HASH_QUEUE_SIZE = int(os.getenv("HASH_QUEUE_SIZE", "64"))
+HASH_RETRY_AFTER = int(os.getenv("HASH_RETRY_AFTER", "1"))
+
+# Password hashing (even though you said no security, we'll do basic hashing)
+pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
+
+
+def hash_password(password: str) -> str:
+    """Hash a password"""
+    return pwd_context.hash(password)
+
+
+def verify_password(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password against its hash"""
+    return pwd_context.verify(plain_password, hashed_password)
+
+
+class HashingPoolSaturated(Exception):
+    """Raised when the hashing queue is full and new work must be rejected"""
+
+
+# -------------------------------------------------------------
+# PROCESS POOL
+# -------------------------------------------------------------
+_hash_pool = None
+_in_flight = 0
+_stats = {
+    "completed": 0,
+    "rejected": 0,
+    "hash_seconds_total": 0.0,
+    "hash_seconds_max": 0.0,
+    "wait_seconds_total": 0.0,
+}
+
+
+def _get_hash_pool():
+    """Get (or lazily create) the bcrypt process pool"""
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ProcessPoolExecutor(
+            max_workers=HASH_POOL_WORKERS,
+            mp_context=multiprocessing.get_context("spawn")
+        )
+    return _hash_pool
+
+
+def _discard_broken_pool(pool):
+    """Drop a pool whose worker died (e.g. OOM-killed) so the next call builds a fresh one"""
+    global _hash_pool
+    if _hash_pool is pool:
+        _hash_pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+
+def _timed_call(func, *args):
+    """Run func inside a worker process and report how long it took"""
+    start = time.perf_counter()
+    result = func(*args)
+    return result, time.perf_counter() - start
+
+
+async def _run_in_hash_pool(func, *args):
+    """
+    Run a hashing function on the process pool.
+
+    Raises HashingPoolSaturated when HASH_POOL_WORKERS + HASH_QUEUE_SIZE
+    calls are already in flight, instead of letting the queue grow. If a
+    worker has died the pool is rebuilt and the call retried once; a second
+    failure is also reported as HashingPoolSaturated.
+    """
+    global _in_flight
+    if _in_flight >= HASH_POOL_WORKERS + HASH_QUEUE_SIZE:
+        _stats["rejected"] += 1
+        HASH_REJECTED.inc()
+        raise HashingPoolSaturated()
+
+    _in_flight += 1
+    started = time.perf_counter()
+    try:
+        loop = asyncio.get_running_loop()
+        for attempt in range(2):
+            pool = _get_hash_pool()
+            try:
+                result, hash_seconds = await loop.run_in_executor(pool, _timed_call, func, *args)
+                break
+            except BrokenProcessPool:
+                _discard_broken_pool(pool)
+                if attempt == 1:
+                    raise HashingPoolSaturated()
+    finally:
+        _in_flight -= 1
+
+    _stats["completed"] += 1
+    _stats["hash_seconds_total"] += hash_seconds
+    _stats["hash_seconds_max"] = max(_stats["hash_seconds_max"], hash_seconds)
+    wait_seconds = max(time.perf_counter() - started - hash_seconds, 0.0)
+    _stats["wait_seconds_total"] += wait_seconds
+    HASH_LATENCY.observe(hash_seconds, func.__name__)
+    HASH_WAIT.observe(wait_seconds, func.__name__)
+    return result
+
+
+async def hash_password_async(password: str) -> str:
+    """Hash a password on the hashing pool"""
+    return await _run_in_hash_pool(hash_password, password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str) -> bool:
+    """Verify a password on the hashing pool"""
+    return await _run_in_hash_pool(verify_password, plain_password, hashed_password)
+
+
+def _queue_depth() -> int:
+    """Calls waiting for a free hashing worker"""
+    return max(_in_flight - HASH_POOL_WORKERS, 0)
+
+
+register(Gauge(
+    "tripify_password_hash_queue_depth", "Hashing calls waiting for a free worker", _queue_depth
+))
+
+
+def get_hash_pool_stats() -> dict:
+    """Get queue depth and timing statistics for the hashing pool"""
+    completed = _stats["completed"]
+    return {
+        "workers": HASH_POOL_WORKERS,
+        "inFlight": _in_flight,
+        "queueDepth": _queue_depth(),
+        "queueCapacity": HASH_QUEUE_SIZE,
+        "completed": completed,
+        "rejected": _stats["rejected"],
+        "avgHashSeconds": round(_stats["hash_seconds_total"] / completed, 4) if completed else 0.0,
+        "maxHashSeconds": round(_stats["hash_seconds_max"], 4),
+        "avgWaitSeconds": round(_stats["wait_seconds_total"] / completed, 4) if completed else 0.0,
+    }
+
+
+def shutdown_hash_pool():
+    """Stop the hashing pool"""
+    global _hash_pool
+    if _hash_pool is not None:
+        _hash_pool.shutdown(wait=False, cancel_futures=True)
+        _hash_pool = None
@@ -1,5 +1,29 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+import numpy as np
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Precomputed mood lookup table: "off", "lazy" (built in the background on first use) or "startup"
+MOOD_LOOKUP_TABLE = os.getenv("MOOD_LOOKUP_TABLE", "off").lower()
+# Optional directory where built tables are saved, keyed by quiz version
+MOOD_LOOKUP_CACHE_DIR = os.getenv("MOOD_LOOKUP_CACHE_DIR")
+# Skip the table for quizzes whose answer space is larger than this
+MOOD_LOOKUP_MAX_ENTRIES = 1 << 22
+
+# Public /quiz/questions payload: include scoring weights, and how long clients may cache it
+QUIZ_PUBLIC_WEIGHTS = os.getenv("QUIZ_PUBLIC_WEIGHTS", "true").lower() == "true"
+QUIZ_QUESTIONS_MAX_AGE = int(os.getenv("QUIZ_QUESTIONS_MAX_AGE", "86400"))
+
 # Quiz questions with weighted mood mappings
 # Each answer option has weights for: energetic, calm, introspective, adventurous
+MOODS = ("energetic", "calm", "introspective", "adventurous")
 
 QUIZ_QUESTIONS = [
     {
@@ -165,42 +189,301 @@ QUIZ_QUESTIONS = [
 ]
 
 
-def calculate_mood_scores(answers: dict) -> dict:
+def compile_quiz_weights(questions: list) -> np.ndarray:
     """
-    Calculate mood scores based on quiz answers
+    Compile quiz weights into a dense (question x option x mood) array.
+
+    Questions with fewer options than the widest one are padded with zeros.
+    """
+    max_options = max(len(q["weights"]) for q in questions)
+    matrix = np.zeros((len(questions), max_options, len(MOODS)))
+    for q_index, question in enumerate(questions):
+        for o_index, weights in enumerate(question["weights"]):
+            matrix[q_index, o_index] = [weights.get(mood, 0) for mood in MOODS]
+    return matrix
+
+
+def quiz_version(questions: list) -> str:
+    """Short content hash of the quiz definition"""
+    payload = json.dumps(questions, sort_keys=True).encode()
+    return hashlib.sha256(payload).hexdigest()[:16]
+
+
+# Compiled once at import; scoring is a gather over this array
+WEIGHT_MATRIX = compile_quiz_weights(QUIZ_QUESTIONS)
+OPTION_COUNTS = np.array([len(q["weights"]) for q in QUIZ_QUESTIONS])
+QUIZ_VERSION = quiz_version(QUIZ_QUESTIONS)
+
+
+def recompile_quiz():
+    """Recompile the scoring arrays after QUIZ_QUESTIONS has been edited in place"""
+    global WEIGHT_MATRIX, OPTION_COUNTS, QUIZ_VERSION
+    WEIGHT_MATRIX = compile_quiz_weights(QUIZ_QUESTIONS)
+    OPTION_COUNTS = np.array([len(q["weights"]) for q in QUIZ_QUESTIONS])
+    QUIZ_VERSION = quiz_version(QUIZ_QUESTIONS)
+
+
+def answers_to_matrix(answer_sets: list) -> np.ndarray:
+    """
+    Pack answer dicts into an (N x question) int array.
+
+    Unanswered questions and out-of-range options are -1; question indexes
+    outside the quiz are dropped.
+    """
+    matrix = np.full((len(answer_sets), len(QUIZ_QUESTIONS)), -1, dtype=np.int64)
+    for row, answers in enumerate(answer_sets):
+        for question_index, option_index in answers.items():
+            # Range-check before assigning: huge ints would overflow int64
+            if 0 <= question_index < len(QUIZ_QUESTIONS) and 0 <= option_index < OPTION_COUNTS[question_index]:
+                matrix[row, question_index] = option_index
+    return matrix
+
+
+def score_answer_matrix(answer_matrix: np.ndarray):
+    """
+    Score many answer sets at once.
 
     Args:
-        answers: Dictionary mapping question index to selected option index
+        answer_matrix: (N x question) array of option indexes; anything out of
+            range (e.g. -1) counts as unanswered
 
     Returns:
-        Dictionary with mood scores and dominant mood
+        (percentages, dominant) where percentages is an (N x mood) array in
+        MOODS order, rounded to 2 decimals, and dominant is an (N,) array of
+        indexes into MOODS
     """
-    mood_scores = {
-        "energetic": 0.0,
-        "calm": 0.0,
-        "introspective": 0.0,
-        "adventurous": 0.0
-    }
+    answer_matrix = np.asarray(answer_matrix)
+    answered = (answer_matrix >= 0) & (answer_matrix < OPTION_COUNTS)
+    options = np.where(answered, answer_matrix, 0)
+
+    # Gather each chosen option's weights: (N x question x mood), then sum questions
+    gathered = WEIGHT_MATRIX[np.arange(len(QUIZ_QUESTIONS)), options]
+    totals = (gathered * answered[..., np.newaxis]).sum(axis=1)
+    return _normalize_totals(totals)
+
+
+def _normalize_totals(totals: np.ndarray):
+    """Turn raw (N x mood) totals into rounded percentages and dominant mood indexes"""
+    grand_totals = totals.sum(axis=1, keepdims=True)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        percentages = np.where(grand_totals > 0, (totals / grand_totals) * 100, totals)
+    percentages = np.round(percentages, 2)
+
+    # Ties go to the first mood in MOODS order
+    dominant = percentages.argmax(axis=1)
+    return percentages, dominant
+
+
+# -------------------------------------------------------------
+# PUBLIC PAYLOAD
+# -------------------------------------------------------------
+_quiz_payloads = {}  # (QUIZ_VERSION, include_weights) -> (body, etag)
+
+
+def serialize_quiz_questions(include_weights: bool = None):
+    """
+    Get the /quiz/questions response body and its ETag.
+
+    Serialized once per quiz version, so requests only copy bytes.
+    """
+    if include_weights is None:
+        include_weights = QUIZ_PUBLIC_WEIGHTS
+    key = (QUIZ_VERSION, include_weights)
+    payload = _quiz_payloads.get(key)
+    if payload is None:
+        questions = QUIZ_QUESTIONS if include_weights else [
+            {k: v for k, v in q.items() if k != "weights"} for q in QUIZ_QUESTIONS
+        ]
+        body = json.dumps({"questions": questions}, separators=(",", ":")).encode()
+        etag = f'"{hashlib.sha256(body).hexdigest()[:32]}"'
+        payload = _quiz_payloads[key] = (body, etag)
+    return payload
+
+
+# -------------------------------------------------------------
+# PRECOMPUTED LOOKUP TABLE
+# -------------------------------------------------------------
+class MoodLookupTable:
+    """
+    Precomputed mood results for every complete answer set.
+
+    A complete answer set is packed into one mixed-radix integer (question 0
+    is the most significant digit). Many answer sets share the same raw
+    totals, so each packed answer set maps to an index into the much smaller
+    list of distinct results.
+    """
+
+    def __init__(self, version: str, option_counts: np.ndarray, result_index: np.ndarray,
+                 percentages: np.ndarray, dominant: np.ndarray):
+        self.version = version
+        self.option_counts = option_counts
+        self.place_values = np.array(
+            [int(np.prod(option_counts[q + 1:])) for q in range(len(option_counts))],
+            dtype=np.int64
+        )
+        self.result_index = result_index
+        self.percentages = percentages
+        self.dominant = dominant
 
-    # Calculate total scores
-    for question_index, option_index in answers.items():
-        if 0 <= question_index < len(QUIZ_QUESTIONS):
-            question = QUIZ_QUESTIONS[question_index]
-            if 0 <= option_index < len(question["weights"]):
-                weights = question["weights"][option_index]
-                for mood, weight in weights.items():
-                    mood_scores[mood] += weight
+    @classmethod
+    def build(cls, weight_matrix: np.ndarray, option_counts: np.ndarray, version: str):
+        """Enumerate the whole answer space, one question at a time"""
+        moods = weight_matrix.shape[2]
+        totals = np.zeros((1, moods))
+        for q_index, count in enumerate(option_counts):
+            totals = (
+                totals[:, np.newaxis, :] + weight_matrix[q_index, :count][np.newaxis, :, :]
+            ).reshape(-1, moods)
 
-    # Normalize scores to percentages
-    total_score = sum(mood_scores.values())
-    if total_score > 0:
-        for mood in mood_scores:
-            mood_scores[mood] = round((mood_scores[mood] / total_score) * 100, 2)
+        if np.array_equal(totals, np.round(totals)) and totals.min() >= 0:
+            # Integer weights: pack each row into one int64 so unique() is a 1-D sort
+            base = int(totals.max()) + 1
+            keys = totals.astype(np.int64) @ (base ** np.arange(moods, dtype=np.int64))
+            _, first_rows, inverse = np.unique(keys, return_index=True, return_inverse=True)
+            unique_totals = totals[first_rows]
+        else:
+            unique_totals, inverse = np.unique(totals, axis=0, return_inverse=True)
+        percentages, dominant = _normalize_totals(unique_totals)
+        return cls(version, option_counts, inverse.reshape(-1).astype(np.uint32), percentages, dominant)
 
-    # Determine dominant mood
-    dominant_mood = max(mood_scores, key=mood_scores.get)
+    @classmethod
+    def load(cls, path: str, option_counts: np.ndarray, version: str):
+        """Load a table saved by save()"""
+        with np.load(path) as data:
+            return cls(version, option_counts, data["result_index"], data["percentages"], data["dominant"])
 
+    def save(self, path: str):
+        """Save the table so other processes/restarts can skip the build"""
+        with open(path, "wb") as f:
+            np.savez(f, result_index=self.result_index, percentages=self.percentages, dominant=self.dominant)
+
+    def __len__(self):
+        return len(self.result_index)
+
+    def score(self, answer_matrix: np.ndarray):
+        """Same contract as score_answer_matrix; complete answer sets are a table lookup"""
+        answer_matrix = np.asarray(answer_matrix)
+        complete = ((answer_matrix >= 0) & (answer_matrix < self.option_counts)).all(axis=1)
+
+        percentages = np.empty((len(answer_matrix), self.percentages.shape[1]))
+        dominant = np.empty(len(answer_matrix), dtype=np.int64)
+        if complete.any():
+            rows = self.result_index[answer_matrix[complete] @ self.place_values]
+            percentages[complete] = self.percentages[rows]
+            dominant[complete] = self.dominant[rows]
+        if not complete.all():
+            percentages[~complete], dominant[~complete] = score_answer_matrix(answer_matrix[~complete])
+        return percentages, dominant
+
+
+_mood_lookup_table = None
+_mood_lookup_version = None  # quiz version the current table (or None) was made for
+_mood_lookup_lock = threading.Lock()
+_mood_lookup_building = False
+_mood_lookup_building_lock = threading.Lock()
+
+
+def _load_or_build_mood_lookup_table():
+    """Load the table for the current quiz version from disk, or build (and save) it"""
+    if int(np.prod(OPTION_COUNTS)) > MOOD_LOOKUP_MAX_ENTRIES:
+        return None
+
+    path = None
+    if MOOD_LOOKUP_CACHE_DIR:
+        path = os.path.join(MOOD_LOOKUP_CACHE_DIR, f"mood_lookup_{QUIZ_VERSION}.npz")
+        if os.path.exists(path):
+            return MoodLookupTable.load(path, OPTION_COUNTS, QUIZ_VERSION)
+
+    table = MoodLookupTable.build(WEIGHT_MATRIX, OPTION_COUNTS, QUIZ_VERSION)
+    if path:
+        os.makedirs(MOOD_LOOKUP_CACHE_DIR, exist_ok=True)
+        table.save(path)
+    return table
+
+
+def get_mood_lookup_table():
+    """
+    Get the lookup table for the current quiz version.
+
+    Built on first use and rebuilt whenever QUIZ_VERSION changes. Returns None
+    when the answer space is too large to precompute.
+    """
+    global _mood_lookup_table, _mood_lookup_version
+    if _mood_lookup_version != QUIZ_VERSION:
+        with _mood_lookup_lock:
+            if _mood_lookup_version != QUIZ_VERSION:
+                _mood_lookup_table = _load_or_build_mood_lookup_table()
+                _mood_lookup_version = QUIZ_VERSION
+    return _mood_lookup_table
+
+
+def get_ready_mood_lookup_table():
+    """
+    Get the lookup table only if it is already built for the current quiz version.
+
+    Otherwise start building it on a background thread and return None, so
+    request handlers never wait on the build (callers score directly meanwhile).
+    """
+    global _mood_lookup_building
+    if _mood_lookup_version == QUIZ_VERSION:
+        return _mood_lookup_table
+    with _mood_lookup_building_lock:
+        if not _mood_lookup_building:
+            _mood_lookup_building = True
+            threading.Thread(
+                target=_build_mood_lookup_table_in_background, name="mood-lookup-build", daemon=True
+            ).start()
+    return None
+
+
+def _build_mood_lookup_table_in_background():
+    global _mood_lookup_building
+    try:
+        get_mood_lookup_table()
+    except Exception:
+        logger.exception("Could not build the mood lookup table")
+    finally:
+        with _mood_lookup_building_lock:
+            _mood_lookup_building = False
+
+
+def _to_mood_result(percentages: np.ndarray, dominant_index: int) -> dict:
+    """Convert one scored row into the API's result dict"""
     return {
-        "moodScores": mood_scores,
-        "dominantMood": dominant_mood
+        "moodScores": {mood: float(score) for mood, score in zip(MOODS, percentages)},
+        "dominantMood": MOODS[dominant_index]
     }
+
+
+def calculate_mood_scores_batch(answer_sets: list) -> list:
+    """
+    Calculate mood scores for many quiz submissions in one pass
+
+    Args:
+        answer_sets: List of dictionaries mapping question index to selected option index
+
+    Returns:
+        List of dictionaries with mood scores and dominant mood, in input order
+    """
+    if not answer_sets:
+        return []
+    answer_matrix = answers_to_matrix(answer_sets)
+    table = get_ready_mood_lookup_table() if MOOD_LOOKUP_TABLE != "off" else None
+    if table is not None:
+        percentages, dominant = table.score(answer_matrix)
+    else:
+        percentages, dominant = score_answer_matrix(answer_matrix)
+    return [_to_mood_result(p, d) for p, d in zip(percentages, dominant)]
+
+
+def calculate_mood_scores(answers: dict) -> dict:
+    """
+    Calculate mood scores based on quiz answers
+
+    Args:
+        answers: Dictionary mapping question index to selected option index
+
+    Returns:
+        Dictionary with mood scores and dominant mood
+    """
+    return calculate_mood_scores_batch([answers])[0]
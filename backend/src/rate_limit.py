@@ -0,0 +1,106 @@
+import threading
+import time
+
+
+class RateLimitExceeded(Exception):
+    """Raised when a call would have to wait longer than the limiter allows"""
+
+    def __init__(self, scope: str, retry_after: float):
+        super().__init__(f"{scope} rate limit exceeded, retry after {retry_after:.2f}s")
+        self.scope = scope  # "user" or "global"
+        self.retry_after = retry_after
+
+
+class RateLimitBackend:
+    """
+    Storage for token buckets, keyed by string.
+
+    reserve() must be atomic per key. The in-process backend uses a lock; a
+    shared one (e.g. a Redis script) lets several workers draw on one budget.
+    """
+
+    def reserve(self, key: str, rate: float, burst: int, max_wait: float) -> float:
+        """
+        Take one token from the bucket.
+
+        Returns how long the caller must wait before using it (0 if one is
+        free now). If that would exceed max_wait, nothing is taken and the
+        required wait is returned negated.
+        """
+        raise NotImplementedError
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    In-process token buckets (GCRA: one timestamp per key).
+
+    Each key stores the time its bucket will be completely refilled; taking a
+    token pushes it 1/rate into the future. Keys whose bucket is full again
+    carry no information, so every prune_every reservations they are dropped
+    (per-user keys change each time an access token rotates).
+    """
+
+    def __init__(self, clock=time.monotonic, prune_every: int = 1024):
+        self._refilled_at = {}
+        self._lock = threading.Lock()
+        self._clock = clock
+        self.prune_every = prune_every
+        self._reservations = 0
+
+    def reserve(self, key: str, rate: float, burst: int, max_wait: float) -> float:
+        interval = 1.0 / rate
+        with self._lock:
+            now = self._clock()
+            refilled_at = max(self._refilled_at.get(key, now), now) + interval
+            wait = max(refilled_at - burst * interval - now, 0.0)
+            if wait > max_wait:
+                return -wait
+            self._refilled_at[key] = refilled_at
+            self._reservations += 1
+            if self._reservations >= self.prune_every:
+                self._reservations = 0
+                self._refilled_at = {k: t for k, t in self._refilled_at.items() if t > now}
+            return wait
+
+    def __len__(self):
+        return len(self._refilled_at)
+
+
+class RateLimiter:
+    """
+    App-wide token bucket plus one bucket per user.
+
+    The per-user bucket is checked first, so one heavy user runs out of
+    their own tokens before draining the shared budget. Callers queue (sleep)
+    for up to max_wait seconds; beyond that RateLimitExceeded is raised.
+    """
+
+    def __init__(self, global_rate: float, global_burst: int, user_rate: float, user_burst: int,
+                 max_wait: float, backend: RateLimitBackend = None, sleep=time.sleep):
+        self.global_rate = global_rate
+        self.global_burst = global_burst
+        self.user_rate = user_rate
+        self.user_burst = user_burst
+        self.max_wait = max_wait
+        self.backend = backend if backend is not None else MemoryRateLimitBackend()
+        self._sleep = sleep
+
+    def acquire(self, user_key: str = None) -> float:
+        """Wait for a token from the user's and the global bucket; return seconds waited"""
+        user_wait = 0.0
+        if user_key and self.user_rate > 0:
+            user_wait = self.backend.reserve(f"user:{user_key}", self.user_rate, self.user_burst, self.max_wait)
+            if user_wait < 0:
+                raise RateLimitExceeded("user", -user_wait)
+
+        global_wait = 0.0
+        if self.global_rate > 0:
+            global_wait = self.backend.reserve("global", self.global_rate, self.global_burst, self.max_wait)
+            if global_wait < 0:
+                # The user's token is not returned; they just asked for more than the app can give
+                raise RateLimitExceeded("global", -global_wait)
+
+        wait = max(user_wait, global_wait)
+        if wait > 0:
+            self._sleep(wait)
+        return wait
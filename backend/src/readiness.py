@@ -0,0 +1,88 @@
+import asyncio
+import logging
+import os
+import time
+import requests
+from dotenv import load_dotenv
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+# Readiness probe settings
+READY_CACHE_SECONDS = float(os.getenv("READY_CACHE_SECONDS", "2"))
+READY_PROBE_TIMEOUT = float(os.getenv("READY_PROBE_TIMEOUT", "2"))
+READY_CHECK_SPOTIFY = os.getenv("READY_CHECK_SPOTIFY", "false").lower() == "true"
+SPOTIFY_TOKEN_URL = "https://accounts.spotify.com/api/token"
+
+
+async def _probe(name: str, check) -> dict:
+    """Run one dependency check with a timeout and time it"""
+    started = time.perf_counter()
+    try:
+        await asyncio.wait_for(check(), timeout=READY_PROBE_TIMEOUT)
+        result = {"ok": True}
+    except Exception as e:
+        logger.warning("Readiness check %s failed: %s", name, e)
+        result = {"ok": False, "error": str(e) or type(e).__name__}
+    result["latencyMs"] = round((time.perf_counter() - started) * 1000, 2)
+    return result
+
+
+async def _ping_mongo(db):
+    if db is None:
+        raise RuntimeError("not connected")
+    await db.command("ping")
+
+
+def _reach_spotify():
+    # Any HTTP answer means the token endpoint is reachable; only 5xx counts as down.
+    # A plain request keeps probes out of the shared session's metrics and retries.
+    response = requests.head(SPOTIFY_TOKEN_URL, timeout=READY_PROBE_TIMEOUT)
+    if response.status_code >= 500:
+        raise RuntimeError(f"HTTP {response.status_code}")
+
+
+async def _run_checks(db) -> dict:
+    checks = {"mongo": lambda: _ping_mongo(db)}
+    if READY_CHECK_SPOTIFY:
+        checks["spotify"] = lambda: asyncio.to_thread(_reach_spotify)
+
+    results = await asyncio.gather(*(_probe(name, check) for name, check in checks.items()))
+    return dict(zip(checks, results))
+
+
+_cached = None  # (monotonic time, report)
+_lock = None
+
+
+async def check_readiness(db) -> dict:
+    """
+    Check every dependency, reusing the last result for READY_CACHE_SECONDS.
+
+    Concurrent probes wait for the one check in progress instead of starting
+    their own, so probe frequency never turns into dependency load.
+    """
+    global _cached, _lock
+    if _lock is None:
+        _lock = asyncio.Lock()
+
+    async with _lock:
+        now = time.monotonic()
+        if _cached is not None and now - _cached[0] < READY_CACHE_SECONDS:
+            checked_at, report = _cached
+            return {**report, "cacheAgeSeconds": round(now - checked_at, 3)}
+
+        checks = await _run_checks(db)
+        report = {
+            "status": "ready" if all(c["ok"] for c in checks.values()) else "not_ready",
+            "checks": checks,
+        }
+        _cached = (time.monotonic(), report)
+        return {**report, "cacheAgeSeconds": 0.0}
+
+
+def reset_readiness_cache():
+    """Forget the cached result so the next probe checks again"""
+    global _cached
+    _cached = None
@@ -0,0 +1,27 @@
+import orjson
+from bson import ObjectId
+from fastapi.responses import JSONResponse
+
+
+def _default(obj):
+    """Serialize the types orjson doesn't know about"""
+    if isinstance(obj, ObjectId):
+        return str(obj)
+    raise TypeError(f"Type is not JSON serializable: {type(obj).__name__}")
+
+
+def dumps(content) -> bytes:
+    """Encode content to JSON bytes (datetimes natively, ObjectIds as strings)"""
+    return orjson.dumps(content, default=_default, option=orjson.OPT_NON_STR_KEYS)
+
+
+class FastJSONResponse(JSONResponse):
+    """
+    JSON response rendered by orjson.
+
+    Set as the app's default response class. Routes returning large payloads
+    return it directly, which also skips FastAPI's jsonable_encoder pass.
+    """
+
+    def render(self, content) -> bytes:
+        return dumps(content)
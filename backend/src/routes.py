@@ -1,33 +1,56 @@
-from fastapi import APIRouter, HTTPException, status
+import asyncio
+import logging
+import math
+import secrets
+from typing import Optional
+from fastapi import APIRouter, HTTPException, Query, Request, Response, status
 from fastapi.responses import RedirectResponse
+from pydantic import ValidationError
 from .models import (
-    UserCreate, UserLogin, UserResponse, QuizAnswers, MoodResult, MoodScores,
+    UserCreate, UserLogin, UserResponse, QuizAnswers, QuizAnswersBatch, MoodResult, MoodScores,
     SpotifyAuthRequest, SpotifyCallbackRequest, CreatePlaylistRequest
 )
-from .database import get_database
-from passlib.context import CryptContext
-from datetime import datetime
-from .quiz_data import calculate_mood_scores, QUIZ_QUESTIONS
+from .database import get_database, get_history_collection
+from .indexes import PLAYLIST_DRAFT_TTL_MINUTES, SPOTIFY_AUTH_SESSION_TTL_MINUTES
+from .pagination import fetch_page, MAX_PAGE_SIZE
+from .responses import FastJSONResponse
+from datetime import datetime, timedelta
+from .passwords import (
+    hash_password, hash_password_async, verify_password_async,
+    HashingPoolSaturated, HASH_RETRY_AFTER
+)
+from .quiz_data import (
+    calculate_mood_scores, calculate_mood_scores_batch, serialize_quiz_questions,
+    QUIZ_QUESTIONS_MAX_AGE
+)
 from bson import ObjectId
+from pymongo.errors import BulkWriteError, DuplicateKeyError
+from .rate_limit import RateLimitExceeded
+from .circuit_breaker import CircuitOpenError
 from .spotify_service import (
     get_spotify_auth_url, get_spotify_client, exchange_code_for_token,
-    get_recommendations, create_playlist
+    get_recommendations, create_playlist, run_spotify
 )
 
 router = APIRouter()
+logger = logging.getLogger(__name__)
 
-# Password hashing (even though you said no security, we'll do basic hashing)
-pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 
-
-def hash_password(password: str) -> str:
-    """Hash a password"""
-    return pwd_context.hash(password)
+def _hashing_busy_error() -> HTTPException:
+    """Error returned when the password hashing pool is saturated"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Authentication is busy, please retry shortly",
+        headers={"Retry-After": str(HASH_RETRY_AFTER)}
+    )
 
 
-def verify_password(plain_password: str, hashed_password: str) -> bool:
-    """Verify a password against its hash"""
-    return pwd_context.verify(plain_password, hashed_password)
+def _email_taken_error() -> HTTPException:
+    """400 for a signup with an email that is already registered"""
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Email already registered"
+    )
 
 
 @router.post("/auth/signup", response_model=UserResponse, status_code=status.HTTP_201_CREATED)
@@ -39,20 +62,26 @@ async def signup(user: UserCreate):
     # Check if user already exists
     existing_user = await users_collection.find_one({"email": user.email})
     if existing_user:
-        raise HTTPException(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            detail="Email already registered"
-        )
+        raise _email_taken_error()
+
+    try:
+        hashed_password = await hash_password_async(user.password)
+    except HashingPoolSaturated:
+        raise _hashing_busy_error()
 
     # Create new user
     user_dict = {
         "fullName": user.fullName,
         "email": user.email,
-        "password": hash_password(user.password),
+        "password": hashed_password,
         "createdAt": datetime.utcnow()
     }
 
-    result = await users_collection.insert_one(user_dict)
+    try:
+        result = await users_collection.insert_one(user_dict)
+    except DuplicateKeyError:
+        # A concurrent signup with the same email won the race (email_unique index)
+        raise _email_taken_error()
 
     # Return user data (without password)
     return UserResponse(
@@ -79,7 +108,12 @@ async def login(user_login: UserLogin):
         )
 
     # Verify password
-    if not verify_password(user_login.password, user["password"]):
+    try:
+        password_ok = await verify_password_async(user_login.password, user["password"])
+    except HashingPoolSaturated:
+        raise _hashing_busy_error()
+
+    if not password_ok:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password"
@@ -117,13 +151,28 @@ async def get_user(email: str):
 
 
 # Quiz Routes
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    """Check an If-None-Match header (list of tags, weak tags or *) against an ETag"""
+    if not if_none_match:
+        return False
+    tags = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in tags or etag in tags or f"W/{etag}" in tags
+
+
 @router.get("/quiz/questions")
-async def get_quiz_questions():
-    """Get all quiz questions"""
-    return {
-        "questions": QUIZ_QUESTIONS
+async def get_quiz_questions(request: Request):
+    """Get all quiz questions (cacheable; revalidate with If-None-Match)"""
+    body, etag = serialize_quiz_questions()
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={QUIZ_QUESTIONS_MAX_AGE}"
     }
 
+    if _etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=status.HTTP_304_NOT_MODIFIED, headers=headers)
+
+    return Response(content=body, media_type="application/json", headers=headers)
+
 
 @router.post("/quiz/calculate-mood", response_model=MoodResult)
 async def calculate_mood(quiz_answers: QuizAnswers):
@@ -139,7 +188,7 @@ async def calculate_mood(quiz_answers: QuizAnswers):
     except Exception as e:
         # If ObjectId conversion fails or user not found, continue anyway for guest users
         user = None
-        print(f"User lookup failed: {e}. Continuing with guest mode.")
+        logger.debug("User lookup failed: %s. Continuing with guest mode.", e)
 
     # Calculate mood scores
     mood_data = calculate_mood_scores(quiz_answers.answers)
@@ -164,18 +213,113 @@ async def calculate_mood(quiz_answers: QuizAnswers):
     )
 
 
-@router.get("/quiz/mood-history/{user_id}")
-async def get_mood_history(user_id: str):
-    """Get user's mood calculation history"""
+def _invalid_cursor_error() -> HTTPException:
+    """Error returned when a pagination cursor can't be decoded"""
+    return HTTPException(
+        status_code=status.HTTP_400_BAD_REQUEST,
+        detail="Invalid cursor"
+    )
+
+
+@router.post("/quiz/calculate-mood/batch")
+async def calculate_mood_batch(batch: QuizAnswersBatch):
+    """Calculate and save mood scores for many quiz submissions in one round-trip"""
     db = get_database()
+    users_collection = db["users"]
     mood_results_collection = db["mood_results"]
 
-    # Get all mood results for user
-    cursor = mood_results_collection.find({"userId": user_id}).sort("createdAt", -1)
-    results = await cursor.to_list(length=100)
+    # Validate each submission on its own; bad ones are reported, the rest saved
+    submissions = []  # (batch index, QuizAnswers)
+    errors = {}
+    for index, raw in enumerate(batch.submissions):
+        try:
+            submissions.append((index, QuizAnswers.model_validate(raw)))
+        except ValidationError as e:
+            errors[index] = "; ".join(
+                f"{'.'.join(str(part) for part in err['loc']) or 'submission'}: {err['msg']}"
+                for err in e.errors()
+            )
+
+    # Resolve every registered user with a single query; anything else is a guest
+    user_object_ids = list({
+        ObjectId(s.userId) for _, s in submissions if ObjectId.is_valid(s.userId)
+    })
+    known_user_ids = set()
+    if user_object_ids:
+        cursor = users_collection.find({"_id": {"$in": user_object_ids}}, {"_id": 1})
+        known_user_ids = {str(u["_id"]) for u in await cursor.to_list(length=None)}
+
+    # Score all submissions in one vectorized pass
+    mood_data = calculate_mood_scores_batch([s.answers for _, s in submissions])
+
+    created_at = datetime.utcnow()
+    mood_results = [
+        {
+            "userId": s.userId,
+            "moodScores": data["moodScores"],
+            "dominantMood": data["dominantMood"],
+            "createdAt": created_at
+        }
+        for (_, s), data in zip(submissions, mood_data)
+    ]
+
+    # Unordered, so one bad document doesn't stop the rest
+    if mood_results:
+        try:
+            await mood_results_collection.insert_many(mood_results, ordered=False)
+        except BulkWriteError as e:
+            for err in e.details.get("writeErrors", []):
+                errors[submissions[err["index"]][0]] = err["errmsg"]
+
+    results = {
+        index: {"index": index, "status": "error", "error": error}
+        for index, error in errors.items()
+    }
+    for (index, _), mood_result in zip(submissions, mood_results):
+        if index in errors:
+            continue
+        results[index] = {
+            "index": index,
+            "status": "ok",
+            "id": str(mood_result["_id"]),
+            "userId": mood_result["userId"],
+            "guest": mood_result["userId"] not in known_user_ids,
+            "moodScores": mood_result["moodScores"],
+            "dominantMood": mood_result["dominantMood"],
+            "createdAt": created_at
+        }
+
+    return FastJSONResponse({
+        "results": [results[index] for index in sorted(results)],
+        "saved": len(results) - len(errors),
+        "failed": len(errors)
+    })
+
+
+@router.get("/quiz/mood-history/{user_id}")
+async def get_mood_history(
+    user_id: str,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """Get user's mood calculation history, newest first (pass nextCursor for more)"""
+    db = get_database()
+    mood_results_collection = get_history_collection(db, "mood_results")
+
+    # Get one page of mood results for user
+    try:
+        results, next_cursor = await fetch_page(
+            mood_results_collection,
+            {"userId": user_id},
+            {"moodScores": 1, "dominantMood": 1, "createdAt": 1},
+            limit,
+            cursor
+        )
+    except ValueError:
+        raise _invalid_cursor_error()
 
     if not results:
-        return {"moodHistory": []}
+        return FastJSONResponse({"moodHistory": [], "nextCursor": None})
 
     # Format results
     mood_history = []
@@ -187,7 +331,7 @@ async def get_mood_history(user_id: str):
             "createdAt": result["createdAt"]
         })
 
-    return {"moodHistory": mood_history}
+    return FastJSONResponse({"moodHistory": mood_history, "nextCursor": next_cursor})
 
 
 # Spotify Routes
@@ -195,13 +339,17 @@ async def get_mood_history(user_id: str):
 async def spotify_auth(userId: str, mood: str = "energetic"):
     """Get Spotify authorization URL"""
     try:
-        auth_url = get_spotify_auth_url()
+        # The OAuth state doubles as the session key, so the callback can find
+        # exactly this user's session with a point lookup
+        state = secrets.token_urlsafe(16)
+        auth_url = get_spotify_auth_url(state)
         # Store userId AND mood in database to retrieve after callback
         db = get_database()
         spotify_auth_collection = db["spotify_auth_sessions"]
 
-        # Store temporary session with mood
+        # Store temporary session with mood (expired by the createdAt TTL index)
         await spotify_auth_collection.insert_one({
+            "_id": state,
             "userId": userId,
             "mood": mood,
             "createdAt": datetime.utcnow()
@@ -220,26 +368,23 @@ async def spotify_callback(code: str, state: str = None):
     """Handle Spotify OAuth callback"""
     try:
         # Exchange code for access token
-        token_info = exchange_code_for_token(code)
+        token_info = await run_spotify(exchange_code_for_token, code)
 
-        # Retrieve the most recent auth session to get mood and userId
-        db = get_database()
-        spotify_auth_collection = db["spotify_auth_sessions"]
+        # Look up (and consume) the session this state was issued for
+        session = None
+        if state:
+            db = get_database()
+            spotify_auth_collection = db["spotify_auth_sessions"]
 
-        # Get the most recent session (within last 10 minutes)
-        from datetime import timedelta
-        cutoff_time = datetime.utcnow() - timedelta(minutes=10)
-        session = await spotify_auth_collection.find_one(
-            {"createdAt": {"$gte": cutoff_time}},
-            sort=[("createdAt", -1)]
-        )
+            # The TTL monitor runs about once a minute, so also check freshness here
+            cutoff_time = datetime.utcnow() - timedelta(minutes=SPOTIFY_AUTH_SESSION_TTL_MINUTES)
+            session = await spotify_auth_collection.find_one_and_delete(
+                {"_id": state, "createdAt": {"$gte": cutoff_time}}
+            )
 
         mood = session.get("mood", "energetic") if session else "energetic"
         user_id = session.get("userId", "guest") if session else "guest"
 
-        # Clean up old sessions
-        await spotify_auth_collection.delete_many({"createdAt": {"$lt": cutoff_time}})
-
         # For simplicity, redirect to frontend with token AND mood
         frontend_url = (
             f"http://localhost:8081/SpotifySuccess?"
@@ -255,6 +400,36 @@ async def spotify_callback(code: str, state: str = None):
         return RedirectResponse(url=error_url)
 
 
+def _spotify_rate_limited_error(e: RateLimitExceeded) -> HTTPException:
+    """429 when this user is over their Spotify budget, 503 when the whole app is"""
+    return HTTPException(
+        status_code=(
+            status.HTTP_429_TOO_MANY_REQUESTS if e.scope == "user"
+            else status.HTTP_503_SERVICE_UNAVAILABLE
+        ),
+        detail="Too many Spotify requests right now, please retry shortly",
+        headers={"Retry-After": str(math.ceil(e.retry_after))}
+    )
+
+
+def _spotify_unavailable_error(e: CircuitOpenError) -> HTTPException:
+    """503 while the Spotify circuit breaker is failing fast"""
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Spotify is unavailable right now, please retry shortly",
+        headers={"Retry-After": str(max(math.ceil(e.retry_after), 1))}
+    )
+
+
+async def _latest_stored_playlist(db, user_id: str, mood: str):
+    """Get the user's most recently saved playlist for a mood, or None"""
+    return await db["playlists"].find_one(
+        {"userId": user_id, "mood": mood},
+        {"tracks": 1, "createdAt": 1},
+        sort=[("createdAt", -1), ("_id", -1)]
+    )
+
+
 @router.post("/spotify/generate-playlist")
 async def generate_playlist(request: CreatePlaylistRequest):
     """Generate playlist recommendations based on mood"""
@@ -263,12 +438,48 @@ async def generate_playlist(request: CreatePlaylistRequest):
         sp = get_spotify_client(request.accessToken)
 
         # Get recommendations based on mood
-        tracks = get_recommendations(sp, request.mood)
+        tracks = await run_spotify(get_recommendations, sp, request.mood)
+
+        # Keep the preview server-side so create-playlist can reuse it.
+        # Only an optimisation: if saving fails, still return the tracks.
+        draft_id = None
+        try:
+            draft = await get_database()["playlist_drafts"].insert_one({
+                "userId": request.userId,
+                "mood": request.mood,
+                "tracks": tracks,
+                "createdAt": datetime.utcnow()
+            })
+            draft_id = str(draft.inserted_id)
+        except Exception as e:
+            logger.warning("Could not save playlist draft: %s", e)
 
-        return {
+        return FastJSONResponse({
             "tracks": tracks,
-            "mood": request.mood
-        }
+            "mood": request.mood,
+            "draftId": draft_id
+        })
+    except RateLimitExceeded as e:
+        raise _spotify_rate_limited_error(e)
+    except CircuitOpenError as e:
+        # Spotify is down: fall back to the last playlist this user saved for the mood
+        stored = None
+        if request.userId != "guest":
+            stored = await _latest_stored_playlist(get_database(), request.userId, request.mood)
+        if not stored:
+            raise _spotify_unavailable_error(e)
+        return FastJSONResponse({
+            "tracks": stored["tracks"],
+            "mood": request.mood,
+            "draftId": None,
+            "stale": True,
+            "staleSince": stored["createdAt"]
+        })
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Spotify took too long to respond"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -276,6 +487,21 @@ async def generate_playlist(request: CreatePlaylistRequest):
         )
 
 
+async def _get_draft_tracks(db, request: CreatePlaylistRequest):
+    """Get the tracks of a still-valid playlist draft for this user and mood"""
+    if not request.draftId or not ObjectId.is_valid(request.draftId):
+        return None
+
+    cutoff_time = datetime.utcnow() - timedelta(minutes=PLAYLIST_DRAFT_TTL_MINUTES)
+    draft = await db["playlist_drafts"].find_one({
+        "_id": ObjectId(request.draftId),
+        "userId": request.userId,
+        "mood": request.mood,
+        "createdAt": {"$gte": cutoff_time}
+    })
+    return draft["tracks"] if draft else None
+
+
 @router.post("/spotify/create-playlist")
 async def create_spotify_playlist(request: CreatePlaylistRequest):
     """Create playlist on user's Spotify account"""
@@ -286,11 +512,15 @@ async def create_spotify_playlist(request: CreatePlaylistRequest):
         # Get Spotify client
         sp = get_spotify_client(request.accessToken)
 
-        # Get recommendations
-        tracks = get_recommendations(sp, request.mood)
+        # Reuse the previewed tracks when possible, otherwise fetch fresh ones
+        tracks = await _get_draft_tracks(db, request)
+        if tracks is None:
+            tracks = await run_spotify(get_recommendations, sp, request.mood)
 
         # Create playlist on Spotify
-        playlist_info = create_playlist(sp, request.userId, request.mood, tracks)
+        playlist_info = await run_spotify(
+            create_playlist, sp, request.userId, request.mood, tracks
+        )
 
         # Save playlist to database
         playlist_doc = {
@@ -306,7 +536,7 @@ async def create_spotify_playlist(request: CreatePlaylistRequest):
 
         result = await playlists_collection.insert_one(playlist_doc)
 
-        return {
+        return FastJSONResponse({
             "success": True,
             "playlistId": str(result.inserted_id),
             "spotifyPlaylistId": playlist_info["playlist_id"],
@@ -314,7 +544,16 @@ async def create_spotify_playlist(request: CreatePlaylistRequest):
             "playlistName": playlist_info["playlist_name"],
             "tracksAdded": playlist_info["tracks_added"],
             "tracks": tracks  # Include tracks for UI display
-        }
+        })
+    except RateLimitExceeded as e:
+        raise _spotify_rate_limited_error(e)
+    except CircuitOpenError as e:
+        raise _spotify_unavailable_error(e)
+    except asyncio.TimeoutError:
+        raise HTTPException(
+            status_code=status.HTTP_504_GATEWAY_TIMEOUT,
+            detail="Spotify took too long to respond"
+        )
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -323,14 +562,24 @@ async def create_spotify_playlist(request: CreatePlaylistRequest):
 
 
 @router.get("/spotify/playlists/{user_id}")
-async def get_user_playlists(user_id: str):
-    """Get user's saved playlists"""
+async def get_user_playlists(
+    user_id: str,
+    limit: int = Query(MAX_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None
+):
+    """Get user's saved playlists, newest first (pass nextCursor for more)"""
     db = get_database()
-    playlists_collection = db["playlists"]
+    playlists_collection = get_history_collection(db, "playlists")
 
     try:
-        cursor = playlists_collection.find({"userId": user_id}).sort("createdAt", -1)
-        playlists = await cursor.to_list(length=100)
+        # Leave the embedded tracks array in the database
+        playlists, next_cursor = await fetch_page(
+            playlists_collection,
+            {"userId": user_id},
+            {"mood": 1, "playlistName": 1, "playlistUrl": 1, "tracksCount": 1, "createdAt": 1},
+            limit,
+            cursor
+        )
 
         result = []
         for playlist in playlists:
@@ -343,7 +592,9 @@ async def get_user_playlists(user_id: str):
                 "createdAt": playlist["createdAt"]
             })
 
-        return {"playlists": result}
+        return FastJSONResponse({"playlists": result, "nextCursor": next_cursor})
+    except ValueError:
+        raise _invalid_cursor_error()
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
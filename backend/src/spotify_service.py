@@ -1,15 +1,74 @@
 import os
+import asyncio
+import contextvars
+import functools
+import hashlib
+import http.cookiejar
+import logging
+import threading
+from typing import Optional
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from urllib.parse import urlsplit
+import requests
 import spotipy
 from spotipy.oauth2 import SpotifyOAuth
+from urllib3.util.retry import Retry
 from dotenv import load_dotenv
+from .cache import MemoryCache, SingleFlight
+from .rate_limit import RateLimiter, RateLimitExceeded
+from .circuit_breaker import CircuitBreaker, CircuitOpenError
+from .catalog import get_track_catalog
+from .metrics import (
+    timed, SPOTIFY_REQUESTS, SPOTIFY_ERRORS, SPOTIFY_LATENCY, SPOTIFY_COALESCED,
+    SPOTIFY_RATE_LIMIT_WAIT, SPOTIFY_RATE_LIMITED, Gauge, register
+)
 
 load_dotenv()
 
+logger = logging.getLogger(__name__)
+
 # Spotify API credentials
 SPOTIFY_CLIENT_ID = os.getenv("SPOTIFY_CLIENT_ID")
 SPOTIFY_CLIENT_SECRET = os.getenv("SPOTIFY_CLIENT_SECRET")
 SPOTIFY_REDIRECT_URI = os.getenv("SPOTIFY_REDIRECT_URI")
 
+# Async execution settings (spotipy is blocking, so calls run on a thread pool)
+SPOTIFY_MAX_WORKERS = int(os.getenv("SPOTIFY_MAX_WORKERS", "16"))
+SPOTIFY_CALL_TIMEOUT = float(os.getenv("SPOTIFY_CALL_TIMEOUT", "20"))
+SPOTIFY_REQUEST_TIMEOUT = float(os.getenv("SPOTIFY_REQUEST_TIMEOUT", "5"))
+# Fetch the fallback range speculatively alongside the primary (costs an extra read per cold preview)
+SPOTIFY_PARALLEL_RANGES = os.getenv("SPOTIFY_PARALLEL_RANGES", "false").lower() == "true"
+
+# Shared HTTP connection pool settings
+SPOTIFY_POOL_SIZE = int(os.getenv("SPOTIFY_POOL_SIZE", str(SPOTIFY_MAX_WORKERS)))
+SPOTIFY_MAX_RETRIES = int(os.getenv("SPOTIFY_MAX_RETRIES", "3"))
+SPOTIFY_BACKOFF_FACTOR = float(os.getenv("SPOTIFY_BACKOFF_FACTOR", "0.3"))
+SPOTIFY_MAX_RETRY_AFTER = float(os.getenv("SPOTIFY_MAX_RETRY_AFTER", "10"))
+
+# Outbound rate limits in requests/second (0 disables a bucket). Calls queue for up
+# to SPOTIFY_RATE_LIMIT_MAX_WAIT seconds, then fail with RateLimitExceeded
+SPOTIFY_RATE_LIMIT = float(os.getenv("SPOTIFY_RATE_LIMIT", "20"))
+SPOTIFY_RATE_LIMIT_BURST = int(os.getenv("SPOTIFY_RATE_LIMIT_BURST", "40"))
+SPOTIFY_USER_RATE_LIMIT = float(os.getenv("SPOTIFY_USER_RATE_LIMIT", "5"))
+SPOTIFY_USER_RATE_LIMIT_BURST = int(os.getenv("SPOTIFY_USER_RATE_LIMIT_BURST", "10"))
+SPOTIFY_RATE_LIMIT_MAX_WAIT = float(os.getenv("SPOTIFY_RATE_LIMIT_MAX_WAIT", "2"))
+
+# Circuit breaker: once SPOTIFY_BREAKER_THRESHOLD of the last SPOTIFY_BREAKER_WINDOW
+# requests failed (at least SPOTIFY_BREAKER_MIN_CALLS seen), fail fast for
+# SPOTIFY_BREAKER_OPEN_SECONDS before trying again
+SPOTIFY_BREAKER_THRESHOLD = float(os.getenv("SPOTIFY_BREAKER_THRESHOLD", "0.5"))
+SPOTIFY_BREAKER_WINDOW = int(os.getenv("SPOTIFY_BREAKER_WINDOW", "20"))
+SPOTIFY_BREAKER_MIN_CALLS = int(os.getenv("SPOTIFY_BREAKER_MIN_CALLS", "10"))
+SPOTIFY_BREAKER_OPEN_SECONDS = float(os.getenv("SPOTIFY_BREAKER_OPEN_SECONDS", "30"))
+
+# Artist genres barely change, so they are cached for a long time
+ARTIST_GENRES_CACHE_TTL = float(os.getenv("ARTIST_GENRES_CACHE_TTL", str(7 * 24 * 3600)))
+ARTIST_GENRES_CACHE_MAX_ENTRIES = int(os.getenv("ARTIST_GENRES_CACHE_MAX_ENTRIES", "50000"))
+
+# Top-tracks cache settings
+SPOTIFY_CACHE_TTL = float(os.getenv("SPOTIFY_CACHE_TTL", "600"))
+SPOTIFY_CACHE_MAX_ENTRIES = int(os.getenv("SPOTIFY_CACHE_MAX_ENTRIES", "2048"))
+
 # Required scopes
 SPOTIFY_SCOPES = (
     "playlist-modify-public "
@@ -20,31 +79,383 @@ SPOTIFY_SCOPES = (
 )
 
 
-def get_spotify_auth_url():
-    """Generate Spotify authorization URL"""
+# -------------------------------------------------------------
+# SHARED HTTP SESSION
+# -------------------------------------------------------------
+class _SpotifyRetry(Retry):
+    """Retry policy that honors Retry-After, but never sleeps longer than the cap"""
+
+    def get_retry_after(self, response):
+        retry_after = super().get_retry_after(response)
+        if retry_after is None:
+            return None
+        return min(retry_after, SPOTIFY_MAX_RETRY_AFTER)
+
+
+class _PooledSpotify(spotipy.Spotify):
+    """spotipy client that borrows the shared session instead of owning one"""
+
+    def __del__(self):
+        # The shared session outlives every client, so it must not be closed here
+        pass
+
+
+class _PooledSpotifyOAuth(SpotifyOAuth):
+    """SpotifyOAuth that borrows the shared session instead of owning one"""
+
+    def __del__(self):
+        pass
+
+
+# Path segments that are followed by an id (collapsed to keep metric labels bounded)
+_ID_PARENTS = {"users", "playlists", "artists", "albums", "tracks"}
+
+
+def _endpoint_label(method: str, url: str) -> str:
+    """Turn a Spotify URL into a low-cardinality label, e.g. 'POST /v1/playlists/{id}/tracks'"""
+    segments = urlsplit(url).path.split("/")
+    for i in range(1, len(segments)):
+        if segments[i - 1] in _ID_PARENTS and segments[i]:
+            segments[i] = "{id}"
+    return f"{method.upper()} {'/'.join(segments)}"
+
+
+_rate_limiter = RateLimiter(
+    global_rate=SPOTIFY_RATE_LIMIT,
+    global_burst=SPOTIFY_RATE_LIMIT_BURST,
+    user_rate=SPOTIFY_USER_RATE_LIMIT,
+    user_burst=SPOTIFY_USER_RATE_LIMIT_BURST,
+    max_wait=SPOTIFY_RATE_LIMIT_MAX_WAIT,
+)
+
+
+spotify_breaker = CircuitBreaker(
+    "spotify",
+    failure_threshold=SPOTIFY_BREAKER_THRESHOLD,
+    window_size=SPOTIFY_BREAKER_WINDOW,
+    min_calls=SPOTIFY_BREAKER_MIN_CALLS,
+    open_seconds=SPOTIFY_BREAKER_OPEN_SECONDS,
+)
+register(Gauge(
+    "tripify_spotify_circuit_open", "1 while the Spotify circuit breaker is failing fast",
+    lambda: int(spotify_breaker.state == CircuitBreaker.OPEN)
+))
+
+# Statuses that mean Spotify itself is struggling (4xx other than 429 are the caller's problem)
+_BREAKER_FAILURE_STATUSES = {429, 500, 502, 503, 504}
+
+# Errors that mean "don't bother trying fallbacks", surfaced to the routes as-is
+_FAIL_FAST_ERRORS = (RateLimitExceeded, CircuitOpenError)
+
+
+def set_rate_limit_backend(backend):
+    """Swap the token-bucket store for another RateLimitBackend (e.g. a shared one)"""
+    _rate_limiter.backend = backend
+
+
+def _rate_limit_key(headers) -> Optional[str]:
+    """Per-user bucket key: a hash of the bearer token (never the token itself)"""
+    authorization = (headers or {}).get("Authorization", "")
+    if not authorization.startswith("Bearer "):
+        return None
+    return hashlib.sha256(authorization[7:].encode()).hexdigest()[:16]
+
+
+class _SpotifySession(requests.Session):
+    """
+    Shared session that guards every Spotify request with the circuit
+    breaker and rate limiter, and records its count, errors and latency.
+    """
+
+    def request(self, method, url, *args, **kwargs):
+        endpoint = _endpoint_label(method, url)
+        is_trial = spotify_breaker.before_call()
+        try:
+            waited = _rate_limiter.acquire(_rate_limit_key(kwargs.get("headers")))
+        except RateLimitExceeded as e:
+            if is_trial:
+                spotify_breaker.cancel_trial()  # nothing reached Spotify, so let the next call try
+            SPOTIFY_RATE_LIMITED.inc(e.scope)
+            raise
+        SPOTIFY_RATE_LIMIT_WAIT.observe(waited)
+        SPOTIFY_REQUESTS.inc(endpoint)
+        try:
+            with timed(SPOTIFY_LATENCY, SPOTIFY_ERRORS, endpoint):
+                response = super().request(method, url, *args, **kwargs)
+        except Exception:
+            spotify_breaker.record_failure()
+            raise
+        if response.status_code >= 400:
+            SPOTIFY_ERRORS.inc(endpoint)
+        if response.status_code in _BREAKER_FAILURE_STATUSES:
+            spotify_breaker.record_failure()
+        else:
+            spotify_breaker.record_success()
+        return response
+
+
+_spotify_session = None
+_spotify_session_lock = threading.Lock()
+
+
+def _build_spotify_session():
+    """Build a keep-alive session with retry/backoff for Spotify traffic"""
+    retry = _SpotifyRetry(
+        total=SPOTIFY_MAX_RETRIES,
+        connect=None,
+        read=False,
+        allowed_methods=frozenset(["GET", "POST", "PUT", "DELETE"]),
+        status=SPOTIFY_MAX_RETRIES,
+        status_forcelist=(429, 500, 502, 503, 504),
+        backoff_factor=SPOTIFY_BACKOFF_FACTOR,
+        respect_retry_after_header=True,
+    )
+    adapter = requests.adapters.HTTPAdapter(
+        pool_connections=2,  # api.spotify.com and accounts.spotify.com
+        pool_maxsize=SPOTIFY_POOL_SIZE,
+        max_retries=retry,
+    )
+    session = _SpotifySession()
+    # Shared by every user, so never keep cookies: one user's Set-Cookie must not ride on another's requests
+    session.cookies.set_policy(http.cookiejar.DefaultCookiePolicy(allowed_domains=[]))
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_spotify_session():
+    """Get the process-wide Spotify HTTP session (created on first use)"""
+    global _spotify_session
+    if _spotify_session is None:
+        with _spotify_session_lock:
+            if _spotify_session is None:
+                _spotify_session = _build_spotify_session()
+    return _spotify_session
+
+
+def close_spotify_session():
+    """Close the shared Spotify HTTP session and its pooled connections"""
+    global _spotify_session
+    with _spotify_session_lock:
+        if _spotify_session is not None:
+            _spotify_session.close()
+            _spotify_session = None
+
+
+# -------------------------------------------------------------
+# AUTH AND CLIENTS
+# -------------------------------------------------------------
+def get_spotify_auth_url(state: str = None):
+    """Generate Spotify authorization URL (state is echoed back to the callback)"""
     sp_oauth = SpotifyOAuth(
         client_id=SPOTIFY_CLIENT_ID,
         client_secret=SPOTIFY_CLIENT_SECRET,
         redirect_uri=SPOTIFY_REDIRECT_URI,
         scope=SPOTIFY_SCOPES,
+        state=state,
         show_dialog=True
     )
     return sp_oauth.get_authorize_url()
 
 
 def exchange_code_for_token(code: str):
-    sp_oauth = SpotifyOAuth(
+    sp_oauth = _PooledSpotifyOAuth(
         client_id=SPOTIFY_CLIENT_ID,
         client_secret=SPOTIFY_CLIENT_SECRET,
         redirect_uri=SPOTIFY_REDIRECT_URI,
-        scope=SPOTIFY_SCOPES
+        scope=SPOTIFY_SCOPES,
+        requests_session=get_spotify_session(),
+        requests_timeout=SPOTIFY_REQUEST_TIMEOUT
     )
     return sp_oauth.get_access_token(code, as_dict=True)
 
 
 def get_spotify_client(access_token: str):
-    """Get authenticated Spotify client"""
-    return spotipy.Spotify(auth=access_token)
+    """
+    Get authenticated Spotify client.
+
+    Clients are cheap: the access token only travels in the Authorization
+    header, while the TCP/TLS connections live in the shared session.
+    """
+    return _PooledSpotify(
+        auth=access_token,
+        requests_session=get_spotify_session(),
+        requests_timeout=SPOTIFY_REQUEST_TIMEOUT
+    )
+
+
+# -------------------------------------------------------------
+# CACHED READS
+# -------------------------------------------------------------
+TOP_TRACKS_PAGE_SIZE = 50  # Spotify max; always fetch a full page so any limit can be served
+
+# Access tokens live for an hour, so the token -> user id mapping can too
+_user_id_cache = MemoryCache(max_entries=SPOTIFY_CACHE_MAX_ENTRIES, ttl=3600)
+_top_tracks_cache = MemoryCache(max_entries=SPOTIFY_CACHE_MAX_ENTRIES, ttl=SPOTIFY_CACHE_TTL)
+
+# Concurrent cache misses for the same key share one Spotify call.
+# Keys are "<read>:<who>:<params>", so the prefix labels the metric.
+_in_flight = SingleFlight(on_coalesce=lambda key: SPOTIFY_COALESCED.inc(key.split(":", 1)[0]))
+
+
+def set_top_tracks_cache(backend):
+    """Swap the top-tracks cache for another CacheBackend (e.g. a shared one)"""
+    global _top_tracks_cache
+    _top_tracks_cache = backend
+
+
+def get_spotify_user_id(sp) -> str:
+    """Get the Spotify user id behind a client, cached per access token"""
+    token = sp._auth
+    user_id = _user_id_cache.get(token)
+    if user_id is None:
+        user_id = _in_flight.do(f"current_user:{token}", _fetch_spotify_user_id, sp, token)
+    return user_id
+
+
+def _fetch_spotify_user_id(sp, token: str) -> str:
+    user_id = sp.current_user()["id"]
+    _user_id_cache.set(token, user_id)
+    return user_id
+
+
+def _slim_track(t: dict) -> dict:
+    """Keep only the track fields we use, so cached entries stay small"""
+    images = t["album"]["images"]
+    return {
+        "id": t["id"],
+        "name": t["name"],
+        "artists": [{"id": a.get("id"), "name": a["name"]} for a in t["artists"]],
+        "duration_ms": t["duration_ms"],
+        "preview_url": t.get("preview_url"),
+        "uri": t["uri"],
+        "album": {"images": images[:1]},
+    }
+
+
+def get_top_tracks(sp, time_range: str, limit: int = TOP_TRACKS_PAGE_SIZE) -> list:
+    """
+    Get the user's top tracks for a time range.
+
+    Results are cached per (Spotify user, time_range) for SPOTIFY_CACHE_TTL
+    seconds, so a preview followed by a create only hits Spotify once.
+    """
+    key = f"top_tracks:{get_spotify_user_id(sp)}:{time_range}"
+    items = _top_tracks_cache.get(key)
+    if items is None:
+        # Concurrent misses (double-fired requests, preview + create) share one fetch
+        items = _in_flight.do(key, _fetch_top_tracks, sp, key, time_range)
+    return items[:limit]
+
+
+def _fetch_top_tracks(sp, key: str, time_range: str) -> list:
+    response = sp.current_user_top_tracks(limit=TOP_TRACKS_PAGE_SIZE, time_range=time_range)
+    items = [_slim_track(t) for t in response.get("items", [])]
+    _top_tracks_cache.set(key, items)
+    return items
+
+
+ARTIST_BATCH_SIZE = 50  # Spotify's per-request limit for the bulk artists endpoint
+
+# Genres are public data, so one cache serves every user
+_artist_genres_cache = MemoryCache(max_entries=ARTIST_GENRES_CACHE_MAX_ENTRIES, ttl=ARTIST_GENRES_CACHE_TTL)
+
+
+def get_artist_genres(sp, artist_ids: list) -> dict:
+    """
+    Get artist id -> genres, cached per artist.
+
+    Uncached artists are fetched through the bulk endpoint in batches of
+    ARTIST_BATCH_SIZE, never one request per artist.
+    """
+    genres = {}
+    missing = []
+    for artist_id in dict.fromkeys(artist_ids):  # dedupe, keep order
+        cached = _artist_genres_cache.get(artist_id)
+        if cached is None:
+            missing.append(artist_id)
+        else:
+            genres[artist_id] = cached
+
+    for batch in _chunk(missing, ARTIST_BATCH_SIZE):
+        genres.update(_in_flight.do(f"artists::{','.join(batch)}", _fetch_artist_genres, sp, batch))
+    return genres
+
+
+def _fetch_artist_genres(sp, artist_ids: list) -> dict:
+    response = sp.artists(artist_ids)
+    genres = {artist_id: [] for artist_id in artist_ids}  # unknown ids are cached as genre-less
+    for artist in response.get("artists", []):
+        if artist:
+            genres[artist["id"]] = artist.get("genres", [])
+    for artist_id, artist_genres in genres.items():
+        _artist_genres_cache.set(artist_id, artist_genres)
+    return genres
+
+
+# -------------------------------------------------------------
+# ASYNC EXECUTION LAYER
+# -------------------------------------------------------------
+_spotify_executor = None
+_range_executor = None
+_range_executor_lock = threading.Lock()
+
+
+def _get_spotify_executor():
+    """Get (or lazily create) the bounded Spotify thread pool"""
+    global _spotify_executor
+    if _spotify_executor is None:
+        _spotify_executor = ThreadPoolExecutor(
+            max_workers=SPOTIFY_MAX_WORKERS,
+            thread_name_prefix="spotify"
+        )
+    return _spotify_executor
+
+
+def _get_range_executor():
+    """
+    Get (or lazily create) the pool used to fan out time-range fetches.
+
+    This is separate from the request pool: get_recommendations already runs
+    on a request worker, and waiting on that same pool could deadlock it.
+    """
+    global _range_executor
+    if _range_executor is None:
+        with _range_executor_lock:
+            if _range_executor is None:
+                _range_executor = ThreadPoolExecutor(
+                    max_workers=SPOTIFY_MAX_WORKERS,
+                    thread_name_prefix="spotify-ranges"
+                )
+    return _range_executor
+
+
+async def run_spotify(func, *args, **kwargs):
+    """
+    Run a blocking Spotify call off the event loop.
+
+    At most SPOTIFY_MAX_WORKERS calls run at once; the rest wait in the pool's
+    queue. Raises asyncio.TimeoutError if the call (queue time included) takes
+    longer than SPOTIFY_CALL_TIMEOUT seconds.
+    """
+    loop = asyncio.get_running_loop()
+    # Run in a copy of the caller's context so logs from the worker keep the request id
+    call = functools.partial(contextvars.copy_context().run, func, *args, **kwargs)
+    return await asyncio.wait_for(
+        loop.run_in_executor(_get_spotify_executor(), call),
+        timeout=SPOTIFY_CALL_TIMEOUT
+    )
+
+
+def shutdown_spotify_executor():
+    """Stop the Spotify thread pools, dropping calls that have not started"""
+    global _spotify_executor, _range_executor
+    if _spotify_executor is not None:
+        _spotify_executor.shutdown(wait=False, cancel_futures=True)
+        _spotify_executor = None
+    if _range_executor is not None:
+        _range_executor.shutdown(wait=False, cancel_futures=True)
+        _range_executor = None
 
 
 # -------------------------------------------------------------
@@ -82,21 +493,173 @@ MOOD_AUDIO_FEATURES = {
     },
 }
 
+# -------------------------------------------------------------
+# MOOD RANKING
+# -------------------------------------------------------------
+def _mood_genre_score(artist_genres: list, mood_genres: list) -> int:
+    """Count the artist's genres that mention one of the mood's genres, e.g. 'indie' in 'indie rock'"""
+    keywords = [g.replace("-", " ") for g in mood_genres]
+    return sum(
+        1 for genre in artist_genres
+        if any(f" {k} " in f" {genre.replace('-', ' ')} " for k in keywords)
+    )
+
+
+def rank_tracks_for_mood(sp, tracks: list, mood: str) -> list:
+    """
+    Order tracks by how well their lead artist's genres match the mood.
+
+    Ties keep the incoming order (the user's own top-tracks ranking). Only
+    the lead artist is looked up, so ranking costs one batched artists call
+    per ARTIST_BATCH_SIZE tracks at most, and none once genres are cached.
+    If genres can't be fetched the tracks are returned unranked.
+    """
+    mood_genres = MOOD_GENRES.get(mood)
+    if not mood_genres:
+        return list(tracks)
+
+    lead_artists = [t["artists"][0]["id"] if t["artists"] else None for t in tracks]
+    try:
+        genres = get_artist_genres(sp, [a for a in lead_artists if a])
+    except Exception as e:
+        logger.warning("Could not fetch artist genres, keeping listening order: %s", e)
+        return list(tracks)
+
+    scores = [_mood_genre_score(genres.get(a, []), mood_genres) if a else 0 for a in lead_artists]
+    order = sorted(range(len(tracks)), key=lambda i: -scores[i])  # stable
+    return [tracks[i] for i in order]
+
+
 # -------------------------------------------------------------
 # GET RECOMMENDATIONS
 # -------------------------------------------------------------
-def get_recommendations(sp, mood: str, limit: int = 20):
+def _merge_variety_tracks(tracks_data: list, variety_tracks: list) -> list:
+    """Append variety tracks that aren't already in the list (deduped by id)"""
+    existing_ids = {t["id"] for t in tracks_data}
+    for track in variety_tracks:
+        if track["id"] not in existing_ids:
+            tracks_data.append(track)
+            existing_ids.add(track["id"])
+    return tracks_data
+
+
+def _fetch_time_ranges_sequential(sp, mood: str, time_range: str, fetch_limit: int, limit: int) -> list:
+    """Fetch the primary time range, then fallback/variety ranges one at a time"""
+    try:
+        logger.debug("Fetching top %d tracks from %s listening history", fetch_limit, time_range)
+        tracks_data = get_top_tracks(sp, time_range, fetch_limit)
+        logger.debug("Found %d tracks", len(tracks_data))
+    except _FAIL_FAST_ERRORS:
+        raise  # the fallback would be refused too; let the caller report it
+    except Exception as e:
+        logger.warning("Error fetching %s tracks: %s", time_range, e)
+        # Fallback to medium-term if primary fails
+        try:
+            tracks_data = get_top_tracks(sp, "medium_term", fetch_limit)
+            logger.info("Fell back to medium_term, found %d tracks", len(tracks_data))
+        except Exception as fallback_error:
+            logger.warning("Fallback to medium_term failed: %s", fallback_error)
+            return []
+
+    # Add some variety based on mood
+    # For adventurous mood, also mix in some long-term favorites
+    if mood == "adventurous" and len(tracks_data) < limit:
+        try:
+            logger.debug("Adding variety from long-term favorites")
+            long_term_tracks = get_top_tracks(sp, "long_term", 20)
+
+            # Add tracks that aren't already in the list
+            _merge_variety_tracks(tracks_data, long_term_tracks)
+
+            logger.debug("Added variety tracks, total %d", len(tracks_data))
+        except Exception as e:
+            logger.info("Could not add variety tracks: %s", e)
+
+    return tracks_data
+
+
+def _fetch_time_ranges_parallel(sp, mood: str, time_range: str, fetch_limit: int, limit: int) -> list:
+    """
+    Fetch the primary and fallback time ranges at the same time.
+
+    The primary range wins when it succeeds, and the speculative fallback is
+    then not waited for; otherwise the fallback is used. As in the sequential
+    path, adventurous moods only fetch long_term favorites when the result
+    came back short.
+    """
+    ranges = [time_range]
+    if time_range != "medium_term":
+        ranges.append("medium_term")  # fallback
+
+    try:
+        # Resolve the user once so the concurrent fetches share the cached id
+        get_spotify_user_id(sp)
+    except _FAIL_FAST_ERRORS:
+        raise
+    except Exception as e:
+        logger.warning("Error fetching tracks: %s", e)
+        return []
+
+    if logger.isEnabledFor(logging.DEBUG):
+        logger.debug("Fetching top %d tracks from %s in parallel", fetch_limit, ", ".join(ranges))
+    executor = _get_range_executor()
+    futures = {
+        # Each worker runs in a copy of the caller's context so its logs keep the request id
+        executor.submit(contextvars.copy_context().run, get_top_tracks, sp, r, fetch_limit): r
+        for r in ranges
+    }
+    results = {}  # filled in completion order
+    fail_fast = None
+    for future in as_completed(futures):
+        try:
+            results[futures[future]] = future.result()
+        except _FAIL_FAST_ERRORS as e:
+            fail_fast = e
+        except Exception as e:
+            logger.warning("Error fetching %s tracks: %s", futures[future], e)
+        if time_range in results:
+            break  # a fallback still running just warms the cache
+
+    if not results and fail_fast is not None:
+        raise fail_fast
+
+    if time_range in results:
+        tracks_data = list(results[time_range])
+    elif results:
+        fallback_range = next(iter(results))
+        logger.info("Falling back to %s", fallback_range)
+        tracks_data = list(results[fallback_range])
+    else:
+        return []
+
+    if mood == "adventurous" and len(tracks_data) < limit:
+        try:
+            _merge_variety_tracks(tracks_data, get_top_tracks(sp, "long_term", 20))
+        except Exception as e:
+            logger.info("Could not add variety tracks: %s", e)
+
+    logger.debug("Found %d tracks", len(tracks_data))
+    return tracks_data
+
+
+def get_recommendations(sp, mood: str, limit: int = 20, parallel: bool = None):
     """
     Get personalized playlist based on mood using user's top tracks.
 
     NOTE: Spotify deprecated the /recommendations and restricted /audio-features endpoints
     in Nov 2024 for new apps. This function now creates playlists directly from user's
     top tracks based on the selected time range that best matches the mood.
+
+    With parallel=True (default: SPOTIFY_PARALLEL_RANGES, off) the fallback
+    time range is fetched alongside the primary instead of only after it
+    fails.
     """
+    if parallel is None:
+        parallel = SPOTIFY_PARALLEL_RANGES
 
     mood = mood.lower()
 
-    print(f"\n=== Creating '{mood}' playlist from user's favorite tracks ===")
+    logger.debug("Building '%s' playlist from the user's favorite tracks", mood)
 
     # Map moods to time ranges for variety
     # - Energetic: Recent tracks (user's current energy)
@@ -116,54 +679,13 @@ def get_recommendations(sp, mood: str, limit: int = 20):
     # Fetch more tracks than we need to ensure variety
     fetch_limit = min(limit * 2, 50)  # Spotify max is 50
 
-    try:
-        print(f"Fetching top {fetch_limit} tracks from {time_range} listening history...")
-        response = sp.current_user_top_tracks(limit=fetch_limit, time_range=time_range)
-        tracks_data = response.get("items", [])
-        print(f"✓ Found {len(tracks_data)} tracks")
-    except Exception as e:
-        print(f"✗ Error fetching tracks: {e}")
-        # Fallback to medium-term if primary fails
-        try:
-            print("Trying fallback to medium-term...")
-            response = sp.current_user_top_tracks(limit=fetch_limit, time_range="medium_term")
-            tracks_data = response.get("items", [])
-            print(f"✓ Fallback successful! Found {len(tracks_data)} tracks")
-        except Exception as fallback_error:
-            print(f"✗ Fallback failed: {fallback_error}")
-            return []
-
-    if not tracks_data:
-        print("✗ No tracks found in user's listening history")
-        return []
-
-    # Add some variety based on mood
-    # For adventurous mood, also mix in some long-term favorites
-    if mood == "adventurous" and len(tracks_data) < limit:
-        try:
-            print("Adding variety from long-term favorites...")
-            long_term_response = sp.current_user_top_tracks(limit=20, time_range="long_term")
-            long_term_tracks = long_term_response.get("items", [])
-
-            # Add tracks that aren't already in the list
-            existing_ids = {t["id"] for t in tracks_data}
-            for track in long_term_tracks:
-                if track["id"] not in existing_ids:
-                    tracks_data.append(track)
-                    existing_ids.add(track["id"])
+    if parallel:
+        tracks_data = _fetch_time_ranges_parallel(sp, mood, time_range, fetch_limit, limit)
+    else:
+        tracks_data = _fetch_time_ranges_sequential(sp, mood, time_range, fetch_limit, limit)
 
-            print(f"✓ Added variety tracks. Total: {len(tracks_data)}")
-        except Exception as e:
-            print(f"Note: Could not add variety tracks: {e}")
-
-    # Shuffle for variety (deterministic based on mood)
-    import random
-    random.seed(hash(mood))  # Same mood = same shuffle order for consistency
-    shuffled = tracks_data.copy()
-    random.shuffle(shuffled)
-
-    # Select the requested number of tracks
-    selected = shuffled[:limit]
+    # Best genre matches for the mood first, then the user's own ranking
+    selected = rank_tracks_for_mood(sp, tracks_data, mood)[:limit]
 
     # Format tracks
     tracks = []
@@ -178,20 +700,72 @@ def get_recommendations(sp, mood: str, limit: int = 20):
             "image": t["album"]["images"][0]["url"] if t["album"]["images"] else None
         })
 
-    print(f"✓ Created playlist with {len(tracks)} tracks for '{mood}' mood\n")
+    # Thin listening history: top up from the local catalog (no Spotify calls)
+    if len(tracks) < limit:
+        tracks.extend(_catalog_tracks(mood, limit - len(tracks), {t["id"] for t in tracks}))
+
+    if not tracks:
+        logger.info("No tracks found in the user's listening history")
+        return []
+
+    logger.debug("Selected %d tracks for '%s' mood", len(tracks), mood)
     return tracks
 
 
+def _catalog_tracks(mood: str, count: int, exclude_ids: set) -> list:
+    """Get up to count tracks whose audio features best fit the mood from the local catalog"""
+    catalog = get_track_catalog()
+    if catalog is None or mood not in MOOD_AUDIO_FEATURES:
+        return []
+
+    matches = catalog.nearest(MOOD_AUDIO_FEATURES[mood], count, exclude_ids)
+    logger.debug("Filled %d tracks for '%s' mood from the catalog", len(matches), mood)
+    return [
+        {
+            "id": t["id"],
+            "name": t["name"],
+            "artists": t["artists"],
+            "duration": None,
+            "preview_url": None,
+            "uri": t["uri"],
+            "image": None
+        }
+        for t in matches
+    ]
+
+
 
 
 # -------------------------------------------------------------
 # CREATE PLAYLIST
 # -------------------------------------------------------------
+PLAYLIST_ADD_BATCH_SIZE = 100  # Spotify's per-request limit for playlist_add_items
+
+
+def _chunk(items: list, size: int):
+    """Split a list into consecutive chunks of at most size items"""
+    return [items[i:i + size] for i in range(0, len(items), size)]
+
+
+def add_tracks_in_batches(sp, playlist_id: str, track_uris: list) -> int:
+    """
+    Add tracks to a playlist in order, PLAYLIST_ADD_BATCH_SIZE at a time.
+
+    Spotify appends each batch to the end of the playlist, so batches are sent
+    back-to-back on the shared keep-alive session rather than concurrently
+    (concurrent appends could land out of order).
+    """
+    added = 0
+    for batch in _chunk(track_uris, PLAYLIST_ADD_BATCH_SIZE):
+        sp.playlist_add_items(playlist_id, batch)
+        added += len(batch)
+    return added
+
+
 def create_playlist(sp, user_id: str, mood: str, tracks: list):
     """Create playlist inside user's Spotify account"""
 
-    user = sp.current_user()
-    sp_user_id = user["id"]
+    sp_user_id = get_spotify_user_id(sp)
 
     playlist_name = f"Tripify – {mood.capitalize()} Mix"
     playlist_description = f"A playlist generated based on your {mood} mood from Tripify."
@@ -204,14 +778,11 @@ def create_playlist(sp, user_id: str, mood: str, tracks: list):
     )
 
     track_uris = [track["uri"] for track in tracks if track.get("uri")]
-
-    if track_uris:
-        sp.playlist_add_items(playlist["id"], track_uris)
+    tracks_added = add_tracks_in_batches(sp, playlist["id"], track_uris)
 
     return {
         "playlist_id": playlist["id"],
         "playlist_name": playlist_name,
         "playlist_url": playlist["external_urls"]["spotify"],
-        "tracks_added": len(track_uris)
+        "tracks_added": tracks_added
     }
-
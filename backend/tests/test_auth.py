@@ -133,3 +133,72 @@ async def test_login_unknown_user(mock_get_db):
             json={"email": "ghost@example.com", "password": "whatever"},
         )
     assert res.status_code == 401
+
+
+@pytest.mark.asyncio
+async def test_signup_rejected_when_hash_pool_saturated(mock_get_db, monkeypatch):
+    await mock_get_db()
+    monkeypatch.setattr("src.passwords._in_flight", 10_000)
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        res = await ac.post(
+            "/api/auth/signup",
+            json={
+                "fullName": "Busy User",
+                "email": "busy@example.com",
+                "password": "pass1234",
+            },
+        )
+    assert res.status_code == 503
+    assert res.headers["retry-after"] == "1"
+
+
+@pytest.mark.asyncio
+async def test_signup_race_on_unique_email_returns_400(mock_get_db, monkeypatch):
+    from pymongo.errors import DuplicateKeyError
+
+    await mock_get_db()
+
+    async def lost_race(self, data):
+        # Another signup inserted the same email after our find_one check
+        raise DuplicateKeyError("E11000 duplicate key error index: email_unique")
+
+    from src.routes import get_database
+    monkeypatch.setattr(type(get_database()["users"]), "insert_one", lost_race)
+
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        res = await ac.post(
+            "/api/auth/signup",
+            json={
+                "fullName": "Racer",
+                "email": "race@example.com",
+                "password": "pass1234",
+            },
+        )
+    assert res.status_code == 400
+    assert res.json()["detail"] == "Email already registered"
+
+
+@pytest.mark.asyncio
+async def test_signup_recovers_after_hash_worker_is_killed(mock_get_db):
+    import os
+    import signal
+    from src import passwords
+
+    await mock_get_db()
+    pool = passwords._get_hash_pool()
+    # Make sure a worker exists, then kill it the way the OOM killer would
+    await passwords.hash_password_async("warm-up")
+    os.kill(next(iter(pool._processes)), signal.SIGKILL)
+
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        res = await ac.post(
+            "/api/auth/signup",
+            json={
+                "fullName": "After Crash",
+                "email": "after-crash@example.com",
+                "password": "pass1234",
+            },
+        )
+
+    assert res.status_code == 201  # rebuilt pool answers on the retry
+    assert passwords._hash_pool is not pool
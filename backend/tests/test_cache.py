@@ -0,0 +1,69 @@
+import threading
+import time
+import pytest
+from src.cache import MemoryCache, SingleFlight
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_memory_cache_expires_entries():
+    clock = FakeClock()
+    cache = MemoryCache(max_entries=10, ttl=60, clock=clock)
+    cache.set("a", 1)
+
+    clock.now = 59
+    assert cache.get("a") == 1
+
+    clock.now = 61
+    assert cache.get("a") is None
+
+
+def test_memory_cache_evicts_least_recently_used():
+    cache = MemoryCache(max_entries=2, ttl=60)
+    cache.set("a", 1)
+    cache.set("b", 2)
+    cache.get("a")  # "b" is now the least recently used
+    cache.set("c", 3)
+
+    assert cache.get("a") == 1
+    assert cache.get("b") is None
+    assert cache.get("c") == 3
+
+
+def test_single_flight_shares_one_call_between_concurrent_callers():
+    flight = SingleFlight()
+    calls = []
+
+    def slow_fetch():
+        calls.append(1)
+        time.sleep(0.1)
+        return "result"
+
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do("k", slow_fetch))) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(calls) == 1
+    assert results == ["result"] * 5
+    assert flight.coalesced == 4
+
+
+def test_single_flight_propagates_errors_and_forgets_finished_calls():
+    flight = SingleFlight()
+
+    def failing():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        flight.do("k", failing)
+
+    assert flight.do("k", lambda: "retried") == "retried"
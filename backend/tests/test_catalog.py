@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from src import catalog
+from src.catalog import TrackCatalog
+from src.spotify_service import MOOD_AUDIO_FEATURES
+
+
+@pytest.fixture
+def small_catalog(tmp_path):
+    TrackCatalog.save(
+        str(tmp_path),
+        ids=[f"track{i:017d}" for i in range(6)],
+        energy=[0.80, 0.82, 0.30, 0.90, 0.75, 0.10],
+        valence=[0.70, 0.50, 0.50, 0.70, 0.72, 0.10],
+        tempo=[128, 125, 90, 100, 130, 70],
+        names=[f"Song {i}" for i in range(6)],
+        artists=[f"Artist {i}" for i in range(6)],
+    )
+    return TrackCatalog.load(str(tmp_path))
+
+
+def test_catalog_columns_are_memory_mapped(small_catalog):
+    assert isinstance(small_catalog.features["energy"], np.memmap)
+    assert len(small_catalog) == 6
+
+
+def test_nearest_respects_constraints_and_orders_by_distance(small_catalog):
+    tracks = small_catalog.nearest(MOOD_AUDIO_FEATURES["energetic"], 3)
+
+    # Track 3 is closest on energy/valence but fails min_tempo=120
+    assert [t["name"] for t in tracks] == ["Song 0", "Song 4", "Song 1"]
+    assert tracks[0]["uri"] == "spotify:track:track00000000000000000"
+    assert tracks[0]["artists"] == ["Artist 0"]
+
+
+def test_nearest_skips_excluded_ids(small_catalog):
+    tracks = small_catalog.nearest(
+        MOOD_AUDIO_FEATURES["energetic"], 2, exclude_ids={"track00000000000000000"}
+    )
+
+    assert [t["name"] for t in tracks] == ["Song 4", "Song 1"]
+
+
+def test_thin_history_is_filled_from_catalog(monkeypatch, small_catalog):
+    from src.spotify_service import get_recommendations, _top_tracks_cache, _user_id_cache
+
+    class EmptyHistorySpotify:
+        _auth = "THIN_HISTORY_TOKEN"
+
+        def current_user(self):
+            return {"id": "thin-user"}
+
+        def current_user_top_tracks(self, limit=20, offset=0, time_range="medium_term"):
+            return {"items": []}
+
+    _top_tracks_cache.clear()
+    _user_id_cache.clear()
+    monkeypatch.setattr(catalog, "_catalog", small_catalog)
+    monkeypatch.setattr(catalog, "_catalog_loaded", True)
+
+    tracks = get_recommendations(EmptyHistorySpotify(), "calm", limit=2)
+
+    # calm: max_tempo=100, closest to energy 0.3 / valence 0.5
+    assert [t["name"] for t in tracks] == ["Song 2", "Song 5"]
@@ -0,0 +1,89 @@
+import pytest
+from src.circuit_breaker import CircuitBreaker, CircuitOpenError
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_breaker(clock):
+    return CircuitBreaker("test", failure_threshold=0.5, window_size=4, min_calls=4, open_seconds=10, clock=clock)
+
+
+def test_opens_once_error_rate_crosses_threshold():
+    breaker = make_breaker(FakeClock())
+    breaker.record_success()
+    breaker.record_failure()
+    breaker.record_success()
+    assert breaker.state == CircuitBreaker.CLOSED
+
+    breaker.record_failure()  # 2 of 4 failed
+
+    assert breaker.state == CircuitBreaker.OPEN
+    with pytest.raises(CircuitOpenError) as exc:
+        breaker.before_call()
+    assert exc.value.retry_after == pytest.approx(10)
+
+
+def test_half_open_allows_one_trial_then_closes_on_success():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record_failure()
+
+    clock.now = 10.0
+    breaker.before_call()  # the trial call
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()  # everyone else still fails fast
+
+    breaker.record_success()
+
+    assert breaker.state == CircuitBreaker.CLOSED
+    breaker.before_call()
+
+
+def test_failed_trial_reopens():
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record_failure()
+
+    clock.now = 10.0
+    breaker.before_call()
+    breaker.record_failure()
+
+    assert breaker.state == CircuitBreaker.OPEN
+    clock.now = 15.0
+    with pytest.raises(CircuitOpenError):
+        breaker.before_call()
+
+
+def test_trial_refused_by_rate_limiter_frees_the_slot(monkeypatch):
+    from src import spotify_service
+    from src.rate_limit import RateLimitExceeded
+
+    clock = FakeClock()
+    breaker = make_breaker(clock)
+    for _ in range(4):
+        breaker.record_failure()
+    clock.now = 10.0
+
+    class RefusingLimiter:
+        def acquire(self, user_key=None):
+            raise RateLimitExceeded("global", 1.0)
+
+    monkeypatch.setattr(spotify_service, "spotify_breaker", breaker)
+    monkeypatch.setattr(spotify_service, "_rate_limiter", RefusingLimiter())
+
+    session = spotify_service._SpotifySession()
+    with pytest.raises(RateLimitExceeded):
+        session.request("GET", "https://api.spotify.com/v1/me")
+
+    # The refused trial never reached Spotify, so the next call gets to be the trial
+    clock.now = 150.0
+    assert breaker.state == CircuitBreaker.HALF_OPEN
+    assert breaker.before_call() is True
@@ -0,0 +1,39 @@
+import gzip
+import pytest
+from httpx import AsyncClient, ASGITransport
+from src.main import app
+from src.compression import CompressionMiddleware, _accepted_encodings
+
+
+@pytest.mark.asyncio
+async def test_large_json_is_gzipped():
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        res = await ac.get("/api/quiz/questions", headers={"Accept-Encoding": "gzip"})
+
+    assert res.status_code == 200
+    assert res.headers["content-encoding"] == "gzip"
+    assert "accept-encoding" in res.headers["vary"].lower()
+    assert res.headers["etag"].startswith("W/")
+    assert int(res.headers["content-length"]) < len(res.content)
+    assert "questions" in res.json()
+
+
+@pytest.mark.asyncio
+async def test_small_or_unaccepted_bodies_are_not_compressed():
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        small = await ac.get("/", headers={"Accept-Encoding": "gzip"})
+        identity = await ac.get("/api/quiz/questions", headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in small.headers
+    assert "content-encoding" not in identity.headers
+
+
+def test_accept_encoding_parsing():
+    assert _accepted_encodings("gzip;q=0, br;q=0.5, deflate") == {"br", "deflate"}
+
+
+def test_gzip_round_trip():
+    middleware = CompressionMiddleware(app=None, gzip_level=1)
+    body = b'{"tracks": []}' * 100
+
+    assert gzip.decompress(middleware.compress(body, "gzip")) == body
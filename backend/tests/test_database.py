@@ -0,0 +1,45 @@
+from pymongo import ReadPreference
+from src import database
+from src.database import get_history_collection
+from tests.conftest import test_db
+
+
+def test_client_options_from_settings(monkeypatch):
+    monkeypatch.setattr(database, "MONGO_MAX_POOL_SIZE", 50)
+    monkeypatch.setattr(database, "MONGO_MIN_POOL_SIZE", 5)
+    monkeypatch.setattr(database, "MONGO_WAIT_QUEUE_TIMEOUT_MS", 2000)
+    monkeypatch.setattr(database, "MONGO_COMPRESSORS", "zstd,snappy")
+
+    options = database._client_options()
+
+    assert options["maxPoolSize"] == 50
+    assert options["minPoolSize"] == 5
+    assert options["waitQueueTimeoutMS"] == 2000
+    assert options["compressors"] == "zstd,snappy"
+
+
+def test_unset_wait_queue_timeout_and_compressors_are_omitted(monkeypatch):
+    monkeypatch.setattr(database, "MONGO_WAIT_QUEUE_TIMEOUT_MS", 0)
+    monkeypatch.setattr(database, "MONGO_COMPRESSORS", "")
+
+    options = database._client_options()
+
+    assert "waitQueueTimeoutMS" not in options
+    assert "compressors" not in options
+
+
+def test_history_reads_prefer_secondaries():
+    collection = get_history_collection(test_db, "mood_results")
+
+    assert collection.read_preference == ReadPreference.SECONDARY_PREFERRED
+    assert test_db["mood_results"].read_preference == ReadPreference.PRIMARY
+
+
+def test_read_preference_names_map_to_pymongo_classes():
+    import pytest
+    from src.database import parse_read_preference
+
+    assert parse_read_preference("primary") == ReadPreference.PRIMARY
+    assert parse_read_preference("nearest") == ReadPreference.NEAREST
+    with pytest.raises(ValueError, match="secondaryPrefered"):
+        parse_read_preference("secondaryPrefered")
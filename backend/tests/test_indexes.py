@@ -0,0 +1,36 @@
+import pytest
+from src.indexes import ensure_indexes, audit_indexes
+from tests.conftest import test_db
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_creates_declared_indexes():
+    await ensure_indexes(test_db)
+
+    users = await test_db["users"].index_information()
+    assert users["email_unique"]["unique"] is True
+
+    history = await test_db["mood_results"].index_information()
+    assert list(history["userId_createdAt_id"]["key"]) == [("userId", 1), ("createdAt", -1), ("_id", -1)]
+
+    sessions = await test_db["spotify_auth_sessions"].index_information()
+    assert sessions["createdAt_ttl"]["expireAfterSeconds"] == 600
+
+
+@pytest.mark.asyncio
+async def test_ensure_indexes_is_idempotent_and_audit_is_clean():
+    await ensure_indexes(test_db)
+    await ensure_indexes(test_db)
+
+    report = await audit_indexes(test_db)
+
+    assert all(not r["missing"] for r in report.values())
+
+
+@pytest.mark.asyncio
+async def test_audit_reports_missing_indexes():
+    await test_db.drop_collection("users")
+
+    report = await audit_indexes(test_db)
+
+    assert report["users"]["missing"] == ["email_unique"]
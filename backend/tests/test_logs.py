@@ -0,0 +1,88 @@
+import io
+import json
+import logging
+import pytest
+from httpx import AsyncClient, ASGITransport
+from src.main import app
+from src import logs
+from src.logs import configure_logging, stop_logging, request_id_var
+from src.spotify_service import run_spotify
+
+
+@pytest.mark.asyncio
+async def test_request_id_is_generated_and_echoed():
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        res = await ac.get("/")
+
+    assert res.status_code == 200
+    assert len(res.headers["x-request-id"]) == 32
+
+
+@pytest.mark.asyncio
+async def test_client_request_id_is_reused():
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        res = await ac.get("/", headers={"X-Request-ID": "abc-123"})
+
+    assert res.headers["x-request-id"] == "abc-123"
+
+
+@pytest.mark.asyncio
+async def test_spotify_worker_logs_keep_request_id():
+    token = request_id_var.set("req-42")
+    try:
+        seen = await run_spotify(request_id_var.get)
+    finally:
+        request_id_var.reset(token)
+
+    assert seen == "req-42"
+
+
+def test_queued_logging_writes_json_with_request_id(monkeypatch):
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    monkeypatch.setattr(logs, "LOG_FORMAT", "json")
+    stream = io.StringIO()
+
+    configure_logging(stream)
+    token = request_id_var.set("req-7")
+    try:
+        logging.getLogger("src.test").info("found %d tracks", 12)
+    finally:
+        request_id_var.reset(token)
+        stop_logging()  # drains the queue before returning
+        root.handlers, root.level = saved_handlers, saved_level
+
+    entry = json.loads(stream.getvalue().strip())
+    assert entry["message"] == "found 12 tracks"
+    assert entry["requestId"] == "req-7"
+    assert entry["level"] == "INFO"
+
+
+def test_formatting_happens_on_listener_thread_and_keeps_exceptions(monkeypatch):
+    import threading
+
+    root = logging.getLogger()
+    saved_handlers, saved_level = root.handlers[:], root.level
+    monkeypatch.setattr(logs, "LOG_FORMAT", "json")
+    stream = io.StringIO()
+    formatted_on = []
+
+    class Probe:
+        def __str__(self):
+            formatted_on.append(threading.current_thread().name)
+            return "probe"
+
+    configure_logging(stream)
+    try:
+        try:
+            raise ValueError("bad track")
+        except ValueError:
+            logging.getLogger("src.test").exception("failed on %s", Probe())
+    finally:
+        stop_logging()
+        root.handlers, root.level = saved_handlers, saved_level
+
+    entry = json.loads(stream.getvalue().strip())
+    assert entry["message"] == "failed on probe"
+    assert "ValueError: bad track" in entry["exception"]
+    assert formatted_on and formatted_on[0] != threading.current_thread().name
@@ -0,0 +1,80 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from src.main import app
+from src.metrics import Counter, Histogram, MongoCommandMetrics, MONGO_LATENCY
+from src.spotify_service import _endpoint_label
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint_reports_route_timings():
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        await ac.get("/api/quiz/mood-history/someone")
+        res = await ac.get("/metrics")
+
+    assert res.status_code == 200
+    assert res.headers["content-type"].startswith("text/plain")
+    # Labelled by route template, not the raw path
+    assert (
+        'tripify_http_requests_total{method="GET",route="/api/quiz/mood-history/{user_id}",status="200"}'
+        in res.text
+    )
+    assert "tripify_http_request_duration_seconds_bucket" in res.text
+    assert "tripify_password_hash_queue_depth" in res.text
+
+
+def test_histogram_renders_cumulative_buckets():
+    histogram = Histogram("test_latency", "Test latency", ("op",), buckets=(0.1, 1.0))
+    histogram.observe(0.05, "read")
+    histogram.observe(0.5, "read")
+    histogram.observe(5.0, "read")
+
+    text = "\n".join(histogram.render())
+
+    assert 'test_latency_bucket{op="read",le="0.1"} 1' in text
+    assert 'test_latency_bucket{op="read",le="1.0"} 2' in text
+    assert 'test_latency_bucket{op="read",le="+Inf"} 3' in text
+    assert 'test_latency_count{op="read"} 3' in text
+
+
+def test_disabled_metrics_record_nothing(monkeypatch):
+    monkeypatch.setattr("src.metrics.METRICS_ENABLED", False)
+    counter = Counter("test_total", "Test counter")
+
+    counter.inc()
+
+    assert counter.render()[2:] == []
+
+
+def test_mongo_listener_records_command_latency():
+    class FakeEvent:
+        command_name = "find"
+        duration_micros = 2500
+
+    MongoCommandMetrics().succeeded(FakeEvent())
+
+    assert any('command="find"' in line for line in MONGO_LATENCY.render())
+
+
+def test_spotify_endpoint_labels_collapse_ids():
+    assert (
+        _endpoint_label("post", "https://api.spotify.com/v1/playlists/abc123/tracks")
+        == "POST /v1/playlists/{id}/tracks"
+    )
+    assert (
+        _endpoint_label("GET", "https://api.spotify.com/v1/me/top/tracks?limit=50")
+        == "GET /v1/me/top/tracks"
+    )
+
+
+def test_mongo_pool_listener_records_checkout_wait():
+    from src.metrics import MongoPoolMetrics, MONGO_POOL_WAIT
+
+    class FakeCheckout:
+        duration = 0.003
+
+    listener = MongoPoolMetrics()
+    listener.connection_checked_out(FakeCheckout())
+    listener.connection_checked_in(FakeCheckout())
+
+    text = "\n".join(MONGO_POOL_WAIT.render())
+    assert 'tripify_mongo_pool_checkout_wait_seconds_bucket{le="0.005"}' in text
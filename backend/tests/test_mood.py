@@ -50,3 +50,66 @@ async def test_mood_invalid_request():
         res = await ac.post("/api/quiz/calculate-mood", json={})
 
     assert res.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_mood_batch_scores_and_saves_every_submission():
+    from src.database import get_database
+
+    user = await get_database()["users"].insert_one(
+        {"fullName": "Kiosk User", "email": "kiosk@example.com", "password": "x"}
+    )
+    registered_id = str(user.inserted_id)
+
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        payload = {
+            "submissions": [
+                {"userId": registered_id, "answers": await generate_answers(1)},
+                {"userId": "guest", "answers": await generate_answers(0)},
+                {"userId": "batch_guest", "answers": {}},
+            ]
+        }
+        res = await ac.post("/api/quiz/calculate-mood/batch", json=payload)
+        history = await ac.get("/api/quiz/mood-history/batch_guest")
+
+    assert res.status_code == 200
+    body = res.json()
+    assert body["saved"] == 3
+    assert body["failed"] == 0
+    assert [r["index"] for r in body["results"]] == [0, 1, 2]
+    assert [r["guest"] for r in body["results"]] == [False, True, True]
+    assert body["results"][0]["dominantMood"] in ["energetic", "calm", "introspective", "adventurous"]
+    assert len(history.json()["moodHistory"]) == 1
+
+
+@pytest.mark.asyncio
+async def test_mood_batch_rejects_empty_batch():
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        res = await ac.post("/api/quiz/calculate-mood/batch", json={"submissions": []})
+
+    assert res.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_mood_batch_reports_malformed_submissions_and_saves_the_rest():
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        payload = {
+            "submissions": [
+                {"userId": "partial_batch_guest", "answers": await generate_answers(0)},
+                {"userId": "partial_batch_guest", "answers": {"0": "not-an-option"}},
+                {"userId": "partial_batch_guest", "answers": await generate_answers(1)},
+                "not even an object",
+                {"userId": "partial_batch_guest", "answers": {}},
+            ]
+        }
+        res = await ac.post("/api/quiz/calculate-mood/batch", json=payload)
+        history = await ac.get("/api/quiz/mood-history/partial_batch_guest")
+
+    assert res.status_code == 200
+    body = res.json()
+    assert body["saved"] == 3
+    assert body["failed"] == 2
+    assert [r["status"] for r in body["results"]] == ["ok", "error", "ok", "error", "ok"]
+    assert [r["index"] for r in body["results"]] == [0, 1, 2, 3, 4]
+    assert "answers" in body["results"][1]["error"]
+    assert len(history.json()["moodHistory"]) == 3
@@ -35,3 +35,32 @@ async def test_mood_history_multiple_entries():
     assert len(body["moodHistory"]) >= 2  # could be greater if persisted
     assert "dominantMood" in body["moodHistory"][0]
     assert "moodScores" in body["moodHistory"][0]
+
+
+async def test_mood_history_pages_with_cursor():
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        user_id = "paged_user"
+        for _ in range(3):
+            await create_mood_record(ac, user_id, {0: 1})
+
+        first = (await ac.get(f"/api/quiz/mood-history/{user_id}?limit=2")).json()
+        second = (
+            await ac.get(
+                f"/api/quiz/mood-history/{user_id}",
+                params={"limit": 2, "cursor": first["nextCursor"]},
+            )
+        ).json()
+
+    assert len(first["moodHistory"]) == 2
+    assert first["nextCursor"]
+    assert len(second["moodHistory"]) == 1
+    assert second["nextCursor"] is None
+
+    ids = [r["id"] for r in first["moodHistory"] + second["moodHistory"]]
+    assert len(set(ids)) == 3
+
+
+async def test_mood_history_invalid_cursor():
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        res = await ac.get("/api/quiz/mood-history/guest?cursor=not-a-cursor")
+    assert res.status_code == 400
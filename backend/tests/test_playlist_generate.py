@@ -53,3 +53,123 @@ async def test_generate_playlist_missing_token():
         )
 
     assert res.status_code == 422
+
+
+@pytest.mark.asyncio
+async def test_generate_playlist_spotify_timeout(monkeypatch):
+    import time
+
+    def slow_recommendations(sp, mood: str):
+        time.sleep(0.5)
+        return []
+
+    monkeypatch.setattr("src.routes.get_recommendations", slow_recommendations)
+    monkeypatch.setattr("src.spotify_service.SPOTIFY_CALL_TIMEOUT", 0.05)
+
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        payload = {"accessToken": "TEST_TOKEN", "userId": "guest", "mood": "energetic"}
+        res = await ac.post("/api/spotify/generate-playlist", json=payload)
+
+    assert res.status_code == 504
+
+
+@pytest.mark.asyncio
+async def test_create_playlist_reuses_previewed_draft(monkeypatch):
+    calls = []
+
+    def counting_recommendations(sp, mood: str):
+        calls.append(mood)
+        return [{"id": f"track{len(calls)}", "name": "Song", "uri": "spotify:track:x"}]
+
+    monkeypatch.setattr("src.routes.get_recommendations", counting_recommendations)
+
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        payload = {"accessToken": "TEST_TOKEN", "userId": "guest", "mood": "calm"}
+        preview = (await ac.post("/api/spotify/generate-playlist", json=payload)).json()
+
+        payload["draftId"] = preview["draftId"]
+        res = await ac.post("/api/spotify/create-playlist", json=payload)
+
+    assert res.status_code == 200
+    assert res.json()["tracks"] == preview["tracks"]
+    assert calls == ["calm"]
+
+
+@pytest.mark.asyncio
+async def test_create_playlist_with_unknown_draft_regenerates():
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        payload = {
+            "accessToken": "TEST_TOKEN",
+            "userId": "guest",
+            "mood": "calm",
+            "draftId": "000000000000000000000000",
+        }
+        res = await ac.post("/api/spotify/create-playlist", json=payload)
+
+    assert res.status_code == 200
+    assert len(res.json()["tracks"]) == 2
+
+
+@pytest.mark.asyncio
+async def test_generate_playlist_rate_limited(monkeypatch):
+    from src.rate_limit import RateLimitExceeded
+
+    def limited_recommendations(sp, mood: str):
+        raise RateLimitExceeded("user", 1.2)
+
+    monkeypatch.setattr("src.routes.get_recommendations", limited_recommendations)
+
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        payload = {"accessToken": "TEST_TOKEN", "userId": "guest", "mood": "energetic"}
+        res = await ac.post("/api/spotify/generate-playlist", json=payload)
+
+    assert res.status_code == 429
+    assert res.headers["retry-after"] == "2"
+
+
+@pytest.mark.asyncio
+async def test_generate_playlist_serves_stale_playlist_while_circuit_open(monkeypatch):
+    from src.circuit_breaker import CircuitOpenError
+
+    def open_circuit(sp, mood: str):
+        raise CircuitOpenError("spotify", 12.0)
+
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        payload = {"accessToken": "TEST_TOKEN", "userId": "stale-user", "mood": "calm"}
+        saved = await ac.post("/api/spotify/create-playlist", json=payload)
+
+        monkeypatch.setattr("src.routes.get_recommendations", open_circuit)
+        res = await ac.post("/api/spotify/generate-playlist", json=payload)
+        other_mood = await ac.post(
+            "/api/spotify/generate-playlist", json={**payload, "mood": "energetic"}
+        )
+
+    assert res.status_code == 200
+    body = res.json()
+    assert body["stale"] is True
+    assert body["tracks"] == saved.json()["tracks"]
+    assert other_mood.status_code == 503
+    assert other_mood.headers["retry-after"] == "12"
+
+
+@pytest.mark.asyncio
+async def test_generate_playlist_returns_tracks_when_draft_save_fails(monkeypatch):
+    from pymongo.errors import PyMongoError
+
+    class FailingDrafts:
+        async def insert_one(self, doc):
+            raise PyMongoError("primary stepped down")
+
+    class DraftlessDB:
+        def __getitem__(self, name):
+            return FailingDrafts()
+
+    monkeypatch.setattr("src.routes.get_database", lambda: DraftlessDB())
+
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        payload = {"accessToken": "TEST_TOKEN", "userId": "guest", "mood": "energetic"}
+        res = await ac.post("/api/spotify/generate-playlist", json=payload)
+
+    assert res.status_code == 200
+    assert res.json()["draftId"] is None
+    assert len(res.json()["tracks"]) == 2
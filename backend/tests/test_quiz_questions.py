@@ -0,0 +1,42 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from src.main import app
+from src.quiz_data import QUIZ_QUESTIONS, serialize_quiz_questions
+
+
+@pytest.mark.asyncio
+async def test_quiz_questions_has_etag_and_cache_headers():
+    async with AsyncClient(
+        transport=ASGITransport(app), base_url="http://test", headers={"Accept-Encoding": "identity"}
+    ) as ac:
+        res = await ac.get("/api/quiz/questions")
+
+    assert res.status_code == 200
+    assert res.json()["questions"] == QUIZ_QUESTIONS
+    assert res.headers["etag"].startswith('"')
+    assert "max-age=" in res.headers["cache-control"]
+
+
+@pytest.mark.asyncio
+async def test_quiz_questions_not_modified_for_matching_etag():
+    async with AsyncClient(
+        transport=ASGITransport(app), base_url="http://test", headers={"Accept-Encoding": "identity"}
+    ) as ac:
+        first = await ac.get("/api/quiz/questions")
+        etag = first.headers["etag"]
+        cached = await ac.get("/api/quiz/questions", headers={"If-None-Match": etag})
+        stale = await ac.get("/api/quiz/questions", headers={"If-None-Match": '"old"'})
+
+    assert cached.status_code == 304
+    assert cached.content == b""
+    assert cached.headers["etag"] == etag
+    assert stale.status_code == 200
+
+
+def test_quiz_questions_can_strip_weights():
+    public_body, public_etag = serialize_quiz_questions(include_weights=False)
+    full_body, full_etag = serialize_quiz_questions(include_weights=True)
+
+    assert b"weights" not in public_body
+    assert b"weights" in full_body
+    assert public_etag != full_etag
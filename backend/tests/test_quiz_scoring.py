@@ -0,0 +1,130 @@
+import random
+from src.quiz_data import (
+    QUIZ_QUESTIONS, calculate_mood_scores, calculate_mood_scores_batch,
+    answers_to_matrix, score_answer_matrix, get_mood_lookup_table, MoodLookupTable
+)
+
+
+def reference_mood_scores(answers: dict) -> dict:
+    """The original per-answer loop, kept to pin down the expected results"""
+    mood_scores = {"energetic": 0.0, "calm": 0.0, "introspective": 0.0, "adventurous": 0.0}
+    for question_index, option_index in answers.items():
+        if 0 <= question_index < len(QUIZ_QUESTIONS):
+            question = QUIZ_QUESTIONS[question_index]
+            if 0 <= option_index < len(question["weights"]):
+                for mood, weight in question["weights"][option_index].items():
+                    mood_scores[mood] += weight
+    total_score = sum(mood_scores.values())
+    if total_score > 0:
+        for mood in mood_scores:
+            mood_scores[mood] = round((mood_scores[mood] / total_score) * 100, 2)
+    return {"moodScores": mood_scores, "dominantMood": max(mood_scores, key=mood_scores.get)}
+
+
+def random_answers(rng):
+    answers = {}
+    for question_index in range(-1, len(QUIZ_QUESTIONS) + 1):
+        if rng.random() < 0.8:
+            answers[question_index] = rng.randint(-1, 4)
+    return answers
+
+
+def test_vectorized_scores_match_reference():
+    rng = random.Random(42)
+    answer_sets = [random_answers(rng) for _ in range(2000)] + [{}]
+
+    batch = calculate_mood_scores_batch(answer_sets)
+
+    for answers, result in zip(answer_sets, batch):
+        assert result == reference_mood_scores(answers)
+        assert calculate_mood_scores(answers) == result
+
+
+def test_huge_option_index_is_ignored():
+    answers = {0: 2 ** 63, 1: 0}
+
+    assert answers_to_matrix([answers])[0, 0] == -1
+    assert calculate_mood_scores(answers) == reference_mood_scores(answers)
+
+
+def test_score_answer_matrix_shapes():
+    matrix = answers_to_matrix([{0: 1, 1: 0}, {}])
+    percentages, dominant = score_answer_matrix(matrix)
+
+    assert matrix.shape == (2, len(QUIZ_QUESTIONS))
+    assert percentages.shape == (2, 4)
+    assert dominant.tolist() == [0, 0]
+    assert percentages[1].tolist() == [0.0, 0.0, 0.0, 0.0]
+
+
+def test_lookup_table_matches_computed_scores():
+    rng = random.Random(7)
+    complete = [
+        {q: rng.randint(0, 3) for q in range(len(QUIZ_QUESTIONS))} for _ in range(500)
+    ]
+    partial = [random_answers(rng) for _ in range(100)]
+    matrix = answers_to_matrix(complete + partial)
+
+    table = get_mood_lookup_table()
+    percentages, dominant = table.score(matrix)
+    expected_percentages, expected_dominant = score_answer_matrix(matrix)
+
+    assert len(table) == 4 ** len(QUIZ_QUESTIONS)
+    assert (percentages == expected_percentages).all()
+    assert (dominant == expected_dominant).all()
+
+
+def test_lookup_table_is_rebuilt_for_new_quiz_version(monkeypatch):
+    table = get_mood_lookup_table()
+
+    monkeypatch.setattr("src.quiz_data.QUIZ_VERSION", "edited-quiz")
+
+    rebuilt = get_mood_lookup_table()
+    assert rebuilt is not table
+    assert rebuilt.version == "edited-quiz"
+
+
+def test_lookup_table_round_trips_through_disk(tmp_path):
+    table = get_mood_lookup_table()
+    path = str(tmp_path / "table.npz")
+
+    table.save(path)
+    loaded = MoodLookupTable.load(path, table.option_counts, table.version)
+
+    assert (loaded.result_index == table.result_index).all()
+    assert (loaded.percentages == table.percentages).all()
+
+
+def test_batch_scoring_uses_lookup_table_when_enabled(monkeypatch):
+    monkeypatch.setattr("src.quiz_data.MOOD_LOOKUP_TABLE", "lazy")
+    get_mood_lookup_table()
+    answers = {q: 2 for q in range(len(QUIZ_QUESTIONS))}
+
+    assert calculate_mood_scores(answers) == reference_mood_scores(answers)
+
+
+def test_lazy_table_builds_in_background_without_blocking(monkeypatch):
+    import threading
+    from src import quiz_data
+
+    release = threading.Event()
+    built = threading.Event()
+
+    def slow_build():
+        release.wait(5)
+        built.set()
+        return None
+
+    monkeypatch.setattr(quiz_data, "MOOD_LOOKUP_TABLE", "lazy")
+    monkeypatch.setattr(quiz_data, "QUIZ_VERSION", "background-build")
+    monkeypatch.setattr(quiz_data, "_load_or_build_mood_lookup_table", slow_build)
+    answers = {q: 1 for q in range(len(QUIZ_QUESTIONS))}
+
+    # Scored directly while the table is still being built
+    assert calculate_mood_scores(answers) == reference_mood_scores(answers)
+    assert not built.is_set()
+
+    release.set()
+    assert built.wait(5)
+    while quiz_data._mood_lookup_building:  # let the thread finish before monkeypatch undo
+        threading.Event().wait(0.01)
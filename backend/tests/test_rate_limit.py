@@ -0,0 +1,88 @@
+import pytest
+from src.rate_limit import MemoryRateLimitBackend, RateLimiter, RateLimitExceeded
+from src.spotify_service import _rate_limit_key
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def make_limiter(clock, **overrides):
+    settings = dict(global_rate=10, global_burst=10, user_rate=1, user_burst=2, max_wait=1.5)
+    settings.update(overrides)
+    slept = []
+    limiter = RateLimiter(backend=MemoryRateLimitBackend(clock=clock), sleep=slept.append, **settings)
+    return limiter, slept
+
+
+def test_burst_is_free_then_callers_queue():
+    clock = FakeClock()
+    limiter, slept = make_limiter(clock)
+
+    assert limiter.acquire("alice") == 0.0
+    assert limiter.acquire("alice") == 0.0
+    assert limiter.acquire("alice") == pytest.approx(1.0)
+    assert slept == [pytest.approx(1.0)]
+
+
+def test_wait_beyond_max_is_refused_without_taking_a_token():
+    clock = FakeClock()
+    limiter, _ = make_limiter(clock)
+    for _ in range(3):
+        limiter.acquire("alice")
+
+    with pytest.raises(RateLimitExceeded) as exc:
+        limiter.acquire("alice")
+    assert exc.value.scope == "user"
+    assert exc.value.retry_after == pytest.approx(2.0)
+
+    clock.now = 1.0  # the refused call did not push the next slot further out
+    assert limiter.acquire("alice") == pytest.approx(1.0)
+
+
+def test_one_user_cannot_starve_another():
+    clock = FakeClock()
+    limiter, _ = make_limiter(clock)
+    for _ in range(3):
+        limiter.acquire("alice")
+    with pytest.raises(RateLimitExceeded):
+        limiter.acquire("alice")
+
+    assert limiter.acquire("bob") == 0.0
+
+
+def test_global_budget_is_shared():
+    clock = FakeClock()
+    limiter, _ = make_limiter(clock, global_rate=1, global_burst=1, user_rate=0)
+
+    limiter.acquire("alice")
+    limiter.acquire("bob")
+
+    with pytest.raises(RateLimitExceeded) as exc:
+        limiter.acquire("carol")
+    assert exc.value.scope == "global"
+
+
+def test_user_key_is_a_token_hash():
+    key = _rate_limit_key({"Authorization": "Bearer SECRET"})
+
+    assert key and "SECRET" not in key
+    assert key == _rate_limit_key({"Authorization": "Bearer SECRET"})
+    assert _rate_limit_key({"Authorization": "Basic abc"}) is None
+
+
+def test_full_buckets_are_pruned():
+    clock = FakeClock()
+    backend = MemoryRateLimitBackend(clock=clock, prune_every=10)
+    for i in range(9):
+        backend.reserve(f"user:{i}", rate=1, burst=2, max_wait=1)
+    assert len(backend) == 9
+
+    clock.now = 5.0  # every bucket has refilled
+    backend.reserve("user:fresh", rate=1, burst=2, max_wait=1)
+
+    assert len(backend) == 1
@@ -0,0 +1,77 @@
+import pytest
+from httpx import AsyncClient, ASGITransport
+from src.main import app
+from src import readiness
+from src.readiness import reset_readiness_cache
+from tests.conftest import test_db
+
+
+@pytest.fixture(autouse=True)
+def fresh_readiness_cache():
+    reset_readiness_cache()
+    yield
+    reset_readiness_cache()
+
+
+@pytest.mark.asyncio
+async def test_ready_when_mongo_answers(monkeypatch):
+    monkeypatch.setattr("src.main.get_database", lambda: test_db)
+
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        res = await ac.get("/ready")
+
+    assert res.status_code == 200
+    data = res.json()
+    assert data["status"] == "ready"
+    assert data["checks"]["mongo"]["ok"] is True
+    assert data["checks"]["mongo"]["latencyMs"] >= 0
+
+
+@pytest.mark.asyncio
+async def test_not_ready_without_mongo(monkeypatch):
+    monkeypatch.setattr("src.main.get_database", lambda: None)
+
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        res = await ac.get("/ready")
+
+    assert res.status_code == 503
+    assert res.json()["checks"]["mongo"]["ok"] is False
+
+
+@pytest.mark.asyncio
+async def test_ready_results_are_cached(monkeypatch):
+    pings = []
+
+    async def counting_ping(db):
+        pings.append(db)
+
+    monkeypatch.setattr(readiness, "_ping_mongo", counting_ping)
+    monkeypatch.setattr(readiness, "READY_CACHE_SECONDS", 60)
+
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        first = await ac.get("/ready")
+        second = await ac.get("/ready")
+
+    assert len(pings) == 1
+    assert first.json()["cacheAgeSeconds"] == 0.0
+    assert second.json()["checks"] == first.json()["checks"]
+
+
+@pytest.mark.asyncio
+async def test_spotify_probe_failure_marks_not_ready(monkeypatch):
+    def unreachable():
+        raise ConnectionError("no route to host")
+
+    monkeypatch.setattr("src.main.get_database", lambda: test_db)
+    monkeypatch.setattr(readiness, "READY_CHECK_SPOTIFY", True)
+    monkeypatch.setattr(readiness, "_reach_spotify", unreachable)
+
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        res = await ac.get("/ready")
+
+    assert res.status_code == 503
+    data = res.json()
+    assert data["checks"]["mongo"]["ok"] is True
+    assert data["checks"]["spotify"] == {
+        "ok": False, "error": "no route to host", "latencyMs": data["checks"]["spotify"]["latencyMs"]
+    }
@@ -0,0 +1,18 @@
+import json
+from datetime import datetime
+from bson import ObjectId
+from src.responses import FastJSONResponse
+
+
+def test_fast_json_response_encodes_datetime_and_objectid():
+    oid = ObjectId()
+    created = datetime(2024, 5, 1, 12, 30, 0, 123000)
+
+    res = FastJSONResponse({"id": oid, "createdAt": created, "scores": {1: 2.5}})
+
+    assert res.media_type == "application/json"
+    assert json.loads(res.body) == {
+        "id": str(oid),
+        "createdAt": created.isoformat(),
+        "scores": {"1": 2.5},
+    }
@@ -6,16 +6,22 @@ from src.main import app
 
 @pytest.mark.asyncio
 async def test_spotify_auth_success(monkeypatch):
+    inserted = []
+    issued_states = []
+
     async def fake_insert_one(doc):
+        inserted.append(doc)
         return None
 
     class FakeCollection:
         async def insert_one(self, doc):
             return await fake_insert_one(doc)
 
-    monkeypatch.setattr(
-        "src.routes.get_spotify_auth_url", lambda: "https://spotify.com/auth"
-    )
+    def fake_auth_url(state=None):
+        issued_states.append(state)
+        return "https://spotify.com/auth"
+
+    monkeypatch.setattr("src.routes.get_spotify_auth_url", fake_auth_url)
     monkeypatch.setattr(
         "src.routes.get_database", lambda: {"spotify_auth_sessions": FakeCollection()}
     )
@@ -26,6 +32,9 @@ async def test_spotify_auth_success(monkeypatch):
     assert res.status_code == 200
     body = res.json()
     assert body["authUrl"] == "https://spotify.com/auth"
+    # The session is keyed by the OAuth state sent to Spotify
+    assert inserted[0]["_id"] == issued_states[0]
+    assert inserted[0]["mood"] == "energetic"
 
 
 @pytest.mark.asyncio
@@ -33,18 +42,15 @@ async def test_spotify_callback_success(monkeypatch):
     def fake_exchange(code):
         return {"access_token": "TEST_ACCESS", "refresh_token": "TEST_REFRESH"}
 
-    async def fake_find_one(query, sort=None):
-        return {"userId": "guest", "mood": "energetic"}
+    queries = []
 
-    async def fake_delete_many(q):
-        return None
+    async def fake_find_one_and_delete(query):
+        queries.append(query)
+        return {"userId": "guest", "mood": "energetic"}
 
     class FakeCollection:
-        async def find_one(self, query, sort=None):
-            return await fake_find_one(query, sort)
-
-        async def delete_many(self, q):
-            return await fake_delete_many(q)
+        async def find_one_and_delete(self, query):
+            return await fake_find_one_and_delete(query)
 
     monkeypatch.setattr("src.routes.exchange_code_for_token", fake_exchange)
     monkeypatch.setattr(
@@ -52,7 +58,7 @@ async def test_spotify_callback_success(monkeypatch):
     )
 
     async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
-        res = await ac.get("/api/spotify/callback?code=123")
+        res = await ac.get("/api/spotify/callback?code=123&state=abc")
 
     assert res.status_code in (301, 302, 307)
     redirect_url = res.headers["location"]
@@ -60,3 +66,31 @@ async def test_spotify_callback_success(monkeypatch):
     assert "refresh_token=TEST_REFRESH" in redirect_url
     assert "mood=energetic" in redirect_url
     assert "userId=guest" in redirect_url
+    assert queries[0]["_id"] == "abc"
+
+
+@pytest.mark.asyncio
+async def test_spotify_callback_uses_session_for_its_state(monkeypatch):
+    issued_states = []
+
+    def fake_auth_url(state=None):
+        issued_states.append(state)
+        return "https://spotify.com/auth"
+
+    monkeypatch.setattr("src.routes.get_spotify_auth_url", fake_auth_url)
+    monkeypatch.setattr(
+        "src.routes.exchange_code_for_token", lambda code: {"access_token": "TOKEN"}
+    )
+
+    async with AsyncClient(transport=ASGITransport(app), base_url="http://test") as ac:
+        await ac.get("/api/spotify/auth?userId=alice&mood=calm")
+        await ac.get("/api/spotify/auth?userId=bob&mood=energetic")
+
+        # Alice finishes second, but must still get her own session
+        res = await ac.get(f"/api/spotify/callback?code=1&state={issued_states[0]}")
+        replay = await ac.get(f"/api/spotify/callback?code=1&state={issued_states[0]}")
+
+    assert "userId=alice" in res.headers["location"]
+    assert "mood=calm" in res.headers["location"]
+    # Sessions are single-use
+    assert "userId=guest" in replay.headers["location"]
@@ -0,0 +1,291 @@
+import gc
+import time
+import pytest
+from concurrent.futures import ThreadPoolExecutor
+from src.spotify_service import (
+    get_spotify_client, get_spotify_session, get_recommendations, create_playlist,
+    get_spotify_user_id, get_top_tracks,
+    rank_tracks_for_mood, _SpotifyRetry, _top_tracks_cache, _user_id_cache, _artist_genres_cache,
+    SPOTIFY_MAX_RETRY_AFTER
+)
+
+
+def test_clients_share_one_session(monkeypatch):
+    closed = []
+    monkeypatch.setattr(get_spotify_session(), "close", lambda: closed.append(True))
+
+    sp1 = get_spotify_client("TOKEN_A")
+    sp2 = get_spotify_client("TOKEN_B")
+
+    assert sp1._session is sp2._session
+    assert sp1._auth_headers() == {"Authorization": "Bearer TOKEN_A"}
+
+    # Dropping a client must not tear down the shared pool
+    del sp1
+    gc.collect()
+    assert get_spotify_session() is sp2._session
+    assert closed == []
+
+
+def test_retry_after_is_capped():
+    class FakeResponse:
+        headers = {"Retry-After": "3600"}
+
+    assert _SpotifyRetry().get_retry_after(FakeResponse()) == SPOTIFY_MAX_RETRY_AFTER
+
+
+def make_track(track_id):
+    return {
+        "id": track_id,
+        "name": f"Song {track_id}",
+        "artists": [{"id": f"artist-{track_id}", "name": "Artist"}],
+        "duration_ms": 180000,
+        "preview_url": None,
+        "uri": f"spotify:track:{track_id}",
+        "album": {"images": [{"url": "http://img"}]},
+    }
+
+
+class FakeSpotify:
+    def __init__(self, token="TOKEN", user_id="user-1", fail_ranges=(), delay=0.0, tracks_per_range=None,
+                 genres=None, range_delays=None):
+        self._auth = token
+        self.user_id = user_id
+        self.fail_ranges = set(fail_ranges)
+        self.delay = delay
+        self.tracks_per_range = tracks_per_range
+        self.top_track_calls = []
+        self.current_user_calls = 0
+        self.added_batches = []
+        self.created_for = None
+        self.genres = genres or {}
+        self.range_delays = range_delays or {}
+        self.artist_batches = []
+
+    def current_user(self):
+        self.current_user_calls += 1
+        return {"id": self.user_id}
+
+    def user_playlist_create(self, user, name, public=True, description=""):
+        self.created_for = user
+        return {"id": "playlist-1", "external_urls": {"spotify": "http://spotify/playlist-1"}}
+
+    def playlist_add_items(self, playlist_id, items, position=None):
+        self.added_batches.append(list(items))
+
+    def artists(self, artists):
+        self.artist_batches.append(list(artists))
+        return {"artists": [{"id": a, "genres": self.genres.get(a, [])} for a in artists]}
+
+    def current_user_top_tracks(self, limit=20, offset=0, time_range="medium_term"):
+        self.top_track_calls.append(time_range)
+        time.sleep(self.range_delays.get(time_range, self.delay))
+        if time_range in self.fail_ranges:
+            raise Exception(f"{time_range} unavailable")
+        count = limit if self.tracks_per_range is None else self.tracks_per_range
+        return {"items": [make_track(f"{time_range}-{i}") for i in range(count)]}
+
+
+@pytest.fixture(autouse=True)
+def clear_spotify_caches():
+    _top_tracks_cache.clear()
+    _user_id_cache.clear()
+    _artist_genres_cache.clear()
+
+
+def test_repeat_recommendations_hit_top_tracks_cache():
+    sp = FakeSpotify()
+
+    first = get_recommendations(sp, "energetic")
+    calls_after_first = list(sp.top_track_calls)
+    second = get_recommendations(sp, "energetic")
+
+    assert [t["id"] for t in first] == [t["id"] for t in second]
+    assert calls_after_first.count("short_term") == 1
+    assert sp.top_track_calls == calls_after_first
+
+
+def test_top_tracks_cache_is_per_user():
+    get_recommendations(FakeSpotify(token="A", user_id="alice"), "calm")
+    other = FakeSpotify(token="B", user_id="bob")
+    get_recommendations(other, "calm")
+
+    assert other.top_track_calls.count("long_term") == 1
+
+
+def test_parallel_fallback_costs_one_round_trip():
+    sp = FakeSpotify(delay=0.2, fail_ranges={"short_term"})
+
+    started = time.perf_counter()
+    tracks = get_recommendations(sp, "energetic", parallel=True)
+    elapsed = time.perf_counter() - started
+
+    assert sorted(sp.top_track_calls) == ["medium_term", "short_term"]
+    assert elapsed < 0.35
+    assert all(t["id"].startswith("medium_term") for t in tracks)
+
+
+def test_adventurous_fetches_long_term_only_when_short():
+    full = FakeSpotify(token="FULL", user_id="full-history")
+    get_recommendations(full, "adventurous", parallel=True)
+    assert "long_term" not in full.top_track_calls
+
+    thin = FakeSpotify(token="THIN", user_id="thin-history", tracks_per_range=5)
+    tracks = get_recommendations(thin, "adventurous", parallel=True)
+
+    # short_term first, long_term merged in for variety, no duplicates
+    ids = [t["id"] for t in tracks]
+    assert len(ids) == len(set(ids)) == 10
+    assert {i.split("-")[0] for i in ids} == {"short_term", "long_term"}
+
+
+def test_parallel_ranges_are_off_by_default():
+    sp = FakeSpotify()
+
+    get_recommendations(sp, "energetic")
+
+    assert sp.top_track_calls == ["short_term"]
+
+
+def test_parallel_ranges_fall_back_when_primary_fails():
+    sp = FakeSpotify(fail_ranges={"short_term"})
+
+    tracks = get_recommendations(sp, "energetic", parallel=True)
+
+    assert tracks
+    assert all(t["id"].startswith("medium_term") for t in tracks)
+
+
+def test_create_playlist_adds_tracks_in_ordered_batches():
+    sp = FakeSpotify()
+    get_recommendations(sp, "calm")  # caches the user id for this token
+    tracks = [{"uri": f"spotify:track:{i}"} for i in range(250)]
+
+    result = create_playlist(sp, "guest", "calm", tracks)
+
+    assert result["tracks_added"] == 250
+    assert [len(b) for b in sp.added_batches] == [100, 100, 50]
+    assert sum(sp.added_batches, []) == [t["uri"] for t in tracks]
+    assert sp.created_for == "user-1"
+    assert sp.current_user_calls == 1
+
+
+def test_concurrent_identical_top_tracks_reads_are_coalesced():
+    sp = FakeSpotify(delay=0.2)
+    get_spotify_user_id(sp)
+
+    with ThreadPoolExecutor(max_workers=4) as pool:
+        results = list(pool.map(lambda _: get_top_tracks(sp, "short_term", 20), range(4)))
+
+    assert sp.top_track_calls == ["short_term"]
+    assert all(r == results[0] for r in results)
+
+
+def test_rate_limited_fetch_is_not_swallowed(monkeypatch):
+    from src.rate_limit import RateLimitExceeded
+
+    sp = FakeSpotify()
+
+    def refused(*args, **kwargs):
+        raise RateLimitExceeded("global", 3.0)
+
+    monkeypatch.setattr(sp, "current_user_top_tracks", refused)
+
+    with pytest.raises(RateLimitExceeded):
+        get_recommendations(sp, "energetic", parallel=True)
+    with pytest.raises(RateLimitExceeded):
+        get_recommendations(sp, "energetic", parallel=False)
+
+
+def test_open_circuit_fails_fast_instead_of_returning_empty(monkeypatch):
+    from src.circuit_breaker import CircuitOpenError
+
+    sp = FakeSpotify()
+
+    def circuit_open(*args, **kwargs):
+        raise CircuitOpenError("spotify", 5.0)
+
+    monkeypatch.setattr(sp, "current_user", circuit_open)
+
+    with pytest.raises(CircuitOpenError):
+        get_recommendations(sp, "calm", parallel=True)
+
+
+def test_tracks_are_ranked_by_mood_genres():
+    sp = FakeSpotify(genres={
+        "artist-short_term-3": ["edm", "big room"],
+        "artist-short_term-7": ["dance pop"],
+        "artist-short_term-1": ["sleep"],
+    })
+
+    tracks = get_recommendations(sp, "energetic", limit=5)
+
+    ids = [t["id"] for t in tracks]
+    # Genre matches first, then the user's own top-tracks order
+    assert ids == ["short_term-3", "short_term-7", "short_term-0", "short_term-1", "short_term-2"]
+
+
+def test_artist_genres_are_fetched_in_batches_and_cached():
+    sp = FakeSpotify()
+    tracks = [make_track(f"t{i}") for i in range(120)]
+
+    rank_tracks_for_mood(sp, tracks, "calm")
+    rank_tracks_for_mood(sp, tracks, "energetic")
+
+    assert [len(b) for b in sp.artist_batches] == [50, 50, 20]
+
+
+def test_ranking_keeps_order_when_genres_unavailable(monkeypatch):
+    sp = FakeSpotify()
+    tracks = [make_track(f"t{i}") for i in range(5)]
+
+    def broken(artists):
+        raise Exception("artists endpoint down")
+
+    monkeypatch.setattr(sp, "artists", broken)
+
+    assert rank_tracks_for_mood(sp, tracks, "calm") == tracks
+
+
+def test_parallel_ranges_do_not_wait_for_slow_fallback():
+    sp = FakeSpotify(range_delays={"medium_term": 1.0})
+
+    started = time.perf_counter()
+    tracks = get_recommendations(sp, "energetic", parallel=True)
+    elapsed = time.perf_counter() - started
+
+    assert elapsed < 0.5
+    assert all(t["id"].startswith("short_term") for t in tracks)
+
+
+def test_shared_session_never_carries_cookies_between_users():
+    import threading
+    from http.server import BaseHTTPRequestHandler, HTTPServer
+    from src.spotify_service import _build_spotify_session
+
+    seen_cookies = []
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            seen_cookies.append(self.headers.get("Cookie"))
+            self.send_response(200)
+            self.send_header("Set-Cookie", f"sid={self.headers['Authorization']}; Path=/")
+            self.send_header("Content-Length", "2")
+            self.end_headers()
+            self.wfile.write(b"{}")
+
+        def log_message(self, *args):
+            pass
+
+    server = HTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        session = _build_spotify_session()
+        url = f"http://127.0.0.1:{server.server_port}/v1/me"
+        session.get(url, headers={"Authorization": "Bearer TOKEN_A"})
+        session.get(url, headers={"Authorization": "Bearer TOKEN_B"})
+    finally:
+        server.shutdown()
+
+    assert seen_cookies == [None, None]
+    assert len(session.cookies) == 0